@@ -0,0 +1,351 @@
+"""
+Benchmarks for the node callbacks, MQTTWrapper and a full plant on a local broker stand-in.
+
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json
+
+Every benchmark runs --repeat times after an untimed warm-up and the best value of each
+figure is reported. Results are written as JSON. With --compare every benchmark is checked
+against the saved result and the exit code is 1 if one of them regressed by more than --threshold.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import (LocalBroker, NullClient, load_node, make_message, measure,  # noqa: E402
+                     best_result, percentile)
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def total(args):
+    # Zu erzeugende Nachrichten: Warm-up plus gemessene
+    return args.n + args.warmup
+
+
+def tick_messages(n):
+    return [make_message('tickgen/tick', f'{1700000000 + 30 * i},{i}') for i in range(n)]
+
+
+def processed_messages(topic, n, types=(1, 2)):
+    return [make_message(topic, json.dumps({"package_type": types[i % len(types)]})) for i in range(n)]
+
+
+def load_supplier():
+    return load_node('supplier', {'EC_NAME': 'supplier_1', 'EC_MQTT_TOPIC': 'supplier/1/data',
+                                  'PACKET_TYPE_1_UNIT': str(10 ** 9), 'PACKET_TYPE_2_UNIT': str(10 ** 9)})
+
+
+def load_storage():
+    return load_node('storage', {'EC_NAME': 'storage_1', 'EC_MQTT_TOPIC': 'storage/1/data',
+                                 'PACKET_TYPE_1_UNIT': '0', 'PACKET_TYPE_2_UNIT': '0',
+                                 'STORAGE_RACKS': '100', 'STORAGE_BINS_PER_RACK': '1000'})
+
+
+def load_roboter(number, broker=None):
+    node = load_node('roboter', {'EC_NAME': f'roboter_{number}', 'EC_MQTT_TOPIC': f'roboter/{number}/status',
+                                 'ROBOTER_STATUS': 'ready'}, broker)
+    # Verarbeitungszeit nicht simulieren
+    node.time = SimpleNamespace(sleep=lambda seconds: None)
+    return node
+
+
+@benchmark('supplier.on_message_tick')
+def bench_supplier_tick(args):
+    node, client = load_supplier(), NullClient()
+    return measure(lambda msg: node.on_message_tick(client, None, msg), tick_messages(total(args)), args.warmup)
+
+
+@benchmark('supplier.request_package')
+def bench_supplier_request(args):
+    node, client = load_supplier(), NullClient()
+    return measure(lambda msg: node.request_package(client, 'roboter/1/request', 1), [None] * total(args),
+                   args.warmup)
+
+
+@benchmark('supplier.on_package_processed')
+def bench_supplier_processed(args):
+    node, client = load_supplier(), NullClient()
+    return measure(lambda msg: node.on_package_processed(client, None, msg),
+                   processed_messages('roboter/1/processed', total(args)), args.warmup)
+
+
+@benchmark('storage.on_message_tick')
+def bench_storage_tick(args):
+    node, client = load_storage(), NullClient()
+    return measure(lambda msg: node.on_message_tick(client, None, msg), tick_messages(total(args)), args.warmup)
+
+
+@benchmark('storage.store_package')
+def bench_storage_store(args):
+    node, client = load_storage(), NullClient()
+    return measure(lambda msg: node.store_package(client, None, msg),
+                   processed_messages('roboter/1/processed', total(args)), args.warmup)
+
+
+@benchmark('storage.remove_package_from_storage')
+def bench_storage_remove(args):
+    node, client = load_storage(), NullClient()
+    # Vorher genug einlagern, damit jede Auslagerung ein Fach findet
+    for msg in processed_messages('roboter/1/processed', total(args) + 200):
+        node.store_package(client, None, msg)
+    return measure(lambda msg: node.remove_package_from_storage(client, None, msg),
+                   processed_messages('roboter/3/processed', total(args)), args.warmup)
+
+
+@benchmark('roboter.on_message')
+def bench_roboter_message(args):
+    node, client = load_roboter(1), NullClient()
+    return measure(lambda msg: node.on_message(client, None, msg),
+                   processed_messages('roboter/1/request', total(args), types=(1,)), args.warmup)
+
+
+@benchmark('roboter.process_package')
+def bench_roboter_process(args):
+    node, client = load_roboter(1), NullClient()
+    return measure(lambda msg: node.process_package(client, 1), [None] * total(args), args.warmup)
+
+
+@benchmark('wrapper.publish')
+def bench_wrapper_publish(args):
+    broker = LocalBroker()
+    wrapper = load_storage_wrapper(broker)
+    return measure(lambda msg: wrapper.publish('storage/1/data', msg), ['{"package_type_1": 1}'] * total(args),
+                   args.warmup)
+
+
+@benchmark('wrapper.dispatch')
+def bench_wrapper_dispatch(args):
+    broker = LocalBroker()
+    wrapper = load_storage_wrapper(broker)
+    wrapper.subscribe('roboter/+/processed')
+    wrapper.subscribe_with_callback('roboter/+/processed', lambda client, userdata, msg: None)
+    payload = json.dumps({"package_type": 1})
+    return measure(lambda msg: wrapper.client.dispatch('roboter/1/processed', payload), [None] * total(args),
+                   args.warmup)
+
+
+@benchmark('wrapper.dispatch_latest')
+def bench_wrapper_dispatch_latest(args):
+    broker = LocalBroker()
+    wrapper = load_storage_wrapper(broker)
+    wrapper.subscribe('tickgen/tick')
+    wrapper.subscribe_latest_with_callback('tickgen/tick', lambda client, userdata, msg: None)
+    return measure(lambda msg: wrapper.client.dispatch('tickgen/tick', msg.payload), tick_messages(total(args)),
+                   args.warmup)
+
+
+def load_storage_wrapper(broker):
+    node = load_node('storage', {'EC_NAME': 'storage_1', 'EC_MQTT_TOPIC': 'storage/1/data'}, broker)
+    return node.MQTTWrapper('mqttbroker', 1883, name='bench_wrapper')
+
+
+class Plant:
+    """
+    Storage, supplier, three robots and analytics running their real main() on a LocalBroker.
+    """
+
+    TICK_NODES = ('storage', 'supplier', 'analytics')
+
+    def __init__(self):
+        self.broker = LocalBroker()
+        self.done = {}
+        self.calls = {}
+        self.warmup_messages = 0
+        nodes = {
+            'storage': load_node('storage', {'EC_NAME': 'storage_1', 'EC_MQTT_TOPIC': 'storage/1/data',
+                                             'PACKET_TYPE_1_UNIT': '0', 'PACKET_TYPE_2_UNIT': '0'}, self.broker),
+            'supplier': load_node('supplier', {'EC_NAME': 'supplier_1', 'EC_MQTT_TOPIC': 'supplier/1/data',
+                                               'PACKET_TYPE_1_UNIT': '100', 'PACKET_TYPE_2_UNIT': '100'}, self.broker),
+            'analytics': load_node('analytics', {'EC_NAME': 'analytics_1', 'EC_MQTT_TOPIC': 'analytics/stats'},
+                                   self.broker),
+        }
+        for number in (1, 2, 3):
+            nodes[f'roboter_{number}'] = load_roboter(number, self.broker)
+        for name in self.TICK_NODES:
+            self.instrument(name, nodes[name])
+        for node in nodes.values():
+            threading.Thread(target=node.main, daemon=True).start()
+        self.wait(lambda: len(self.broker.clients) == len(nodes) and all(c.subscriptions for c in self.broker.clients))
+
+    def instrument(self, name, node):
+        # Meldet das Ende jedes Tick-Callbacks, main() registriert die umhüllte Funktion
+        callback = node.on_message_tick
+        self.done[name] = -1
+        self.calls[name] = 0
+
+        def on_message_tick(client, userdata, msg):
+            callback(client, userdata, msg)
+            self.calls[name] += 1
+            self.done[name] = int(msg.payload.split(b',')[1])
+        node.on_message_tick = on_message_tick
+
+    def warm_up(self, ticks):
+        # Ticks im Gleichschritt vor der Messung, ihre Nachrichten zählen nicht mit
+        for seq in range(ticks):
+            self.tick(seq)
+            self.wait(lambda: self.settled(seq))
+        self.warmup_messages = self.broker.messages
+
+    def tick(self, seq):
+        self.broker.publish('tickgen/tick', f'{1700000000 + 30 * seq},{seq}')
+
+    def settled(self, seq):
+        return all(self.done[name] >= seq for name in self.TICK_NODES) and self.broker.idle()
+
+    def wait(self, condition, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise TimeoutError('plant did not settle')
+            time.sleep(0.00005)
+
+    def stop(self):
+        self.broker.stop()
+
+
+@benchmark('plant.lockstep')
+def bench_plant_lockstep(args):
+    # Ein Tick nach dem anderen, Latenz bis alle Folgenachrichten verarbeitet sind
+    plant = Plant()
+    plant.warm_up(args.warmup_ticks)
+    latencies = []
+    start = time.perf_counter_ns()
+    for seq in range(args.warmup_ticks, args.warmup_ticks + args.ticks):
+        t0 = time.perf_counter_ns()
+        plant.tick(seq)
+        plant.wait(lambda: plant.settled(seq))
+        latencies.append(time.perf_counter_ns() - t0)
+    total = time.perf_counter_ns() - start
+    messages = plant.broker.messages - plant.warmup_messages
+    plant.stop()
+
+    latencies.sort()
+    return {
+        "messages": messages,
+        "ops_per_sec": args.ticks / (total / 1e9),
+        "messages_per_sec": messages / (total / 1e9),
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p95_us": percentile(latencies, 0.95) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+    }
+
+
+@benchmark('plant.burst')
+def bench_plant_burst(args):
+    # Alle Ticks auf einmal, misst den Durchsatz beim Aufholen samt zusammengefasster Ticks
+    plant = Plant()
+    plant.warm_up(args.warmup_ticks)
+    last = args.warmup_ticks + args.ticks - 1
+    start = time.perf_counter_ns()
+    for seq in range(args.warmup_ticks, last + 1):
+        plant.tick(seq)
+    plant.wait(lambda: plant.settled(last))
+    total = time.perf_counter_ns() - start
+    messages = plant.broker.messages - plant.warmup_messages
+    result = {
+        "messages": messages,
+        "ops_per_sec": args.ticks / (total / 1e9),
+        "messages_per_sec": messages / (total / 1e9),
+        "tick_callbacks": {name: calls - args.warmup_ticks for name, calls in plant.calls.items()},
+    }
+    plant.stop()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """
+    Gibt die Liste der Regressionen gegenüber einem gespeicherten Ergebnis zurück.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if current["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(f'{name}: ops_per_sec {base["ops_per_sec"]:.0f} -> {current["ops_per_sec"]:.0f}')
+        if "p95_us" in base and current["p95_us"] > base["p95_us"] * (1 + threshold):
+            regressions.append(f'{name}: p95_us {base["p95_us"]:.1f} -> {current["p95_us"]:.1f}')
+        if "alloc_peak_bytes" in base and \
+                current["alloc_peak_bytes"] > base["alloc_peak_bytes"] * (1 + threshold) + 256:
+            regressions.append(f'{name}: alloc_peak_bytes {base["alloc_peak_bytes"]:.0f} -> '
+                               f'{current["alloc_peak_bytes"]:.0f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', type=int, default=5000, help='messages per callback benchmark')
+    parser.add_argument('--ticks', type=int, default=200, help='ticks per plant benchmark')
+    parser.add_argument('--warmup', type=int, default=200, help='untimed messages before each callback benchmark')
+    parser.add_argument('--warmup-ticks', type=int, default=20, help='untimed ticks before each plant benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, the best run is reported')
+    parser.add_argument('--only', nargs='*', help='run only benchmarks starting with these prefixes')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare against a saved JSON result')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--log', action='store_true', help='keep the node logging enabled')
+    args = parser.parse_args()
+
+    if not args.log:
+        logging.disable(logging.CRITICAL)
+
+    selected = {name: func for name, func in BENCHMARKS.items()
+                if not args.only or any(name.startswith(prefix) for prefix in args.only)}
+    # Wiederholungen reihum, damit eine langsame Phase der Maschine nicht alle Läufe eines Benchmarks trifft
+    runs = {name: [] for name in selected}
+    for _ in range(args.repeat):
+        for name, func in selected.items():
+            runs[name].append(func(args))
+
+    results = {}
+    for name in selected:
+        results[name] = best_result(runs[name])
+        r = results[name]
+        print(f'{name:40s} {r["ops_per_sec"]:12.0f} ops/s'
+              f'  p50 {r.get("p50_us", 0):9.1f} us  p95 {r.get("p95_us", 0):9.1f} us'
+              f'  p99 {r.get("p99_us", 0):9.1f} us  alloc {r.get("alloc_peak_bytes", 0):8.0f} B/msg')
+
+    output = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "n": args.n,
+            "ticks": args.ticks,
+            "warmup": args.warmup,
+            "warmup_ticks": args.warmup_ticks,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
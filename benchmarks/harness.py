@@ -0,0 +1,261 @@
+import importlib.util
+import os
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import paho.mqtt.client as paho
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Modules that exist once per node directory and must not leak between nodes
+NODE_MODULES = ('run', 'mqtt', 'locations', 'assignment', 'window', 'reconciliation')
+
+_loaded = 0
+
+
+def make_message(topic, payload):
+    msg = paho.MQTTMessage(topic=topic.encode('utf-8'))
+    msg.payload = _to_bytes(payload)
+    return msg
+
+
+def _to_bytes(payload):
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    return str(payload).encode('utf-8')
+
+
+class NullClient:
+    # Client for calling node callbacks directly, publishes are only counted
+    def __init__(self):
+        self.published = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published += 1
+
+
+class LocalBroker:
+    """
+    In-process stand-in for the Mosquitto broker. Every LocalClient gets its own
+    inbound queue and dispatch thread, like the network thread of a paho client.
+    """
+
+    def __init__(self):
+        self.clients = []
+        self.retained = {}
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.messages = 0
+
+    def client_factory(self):
+        return SimpleNamespace(Client=lambda *args, **kwargs: LocalClient(self, *args, **kwargs),
+                               CallbackAPIVersion=paho.CallbackAPIVersion)
+
+    def publish(self, topic, payload, retain=False):
+        payload = _to_bytes(payload)
+        with self.lock:
+            self.messages += 1
+            if retain and payload:
+                self.retained[topic] = payload
+            elif retain:
+                # An empty payload clears the retained message, as in MQTT
+                self.retained.pop(topic, None)
+            targets = [c for c in self.clients if c.matches(topic)]
+            self.pending += len(targets)
+        for client in targets:
+            client.inbox.put((topic, payload))
+
+    def subscribed(self, client, sub):
+        with self.lock:
+            retained = [(t, p) for t, p in self.retained.items() if paho.topic_matches_sub(sub, t)]
+            self.pending += len(retained)
+        for item in retained:
+            client.inbox.put(item)
+
+    def done(self):
+        with self.lock:
+            self.pending -= 1
+
+    def idle(self):
+        return self.pending == 0
+
+    def stop(self):
+        for client in self.clients:
+            client.inbox.put(None)
+
+
+class LocalClient:
+    """
+    Subset of paho.mqtt.client.Client used by MQTTWrapper and the nodes.
+    """
+
+    def __init__(self, broker, *args, **kwargs):
+        self.broker = broker
+        self.inbox = queue.Queue()
+        self.subscriptions = set()
+        self.callbacks = {}
+        self.on_connect = None
+        self.on_message = None
+        self.thread = None
+        broker.clients.append(self)
+
+    def matches(self, topic):
+        return any(paho.topic_matches_sub(sub, topic) for sub in self.subscriptions)
+
+    def connect(self, host, port=1883, keepalive=60):
+        pass
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.broker.publish(topic, payload, retain)
+
+    def subscribe(self, topic, qos=0):
+        if topic not in self.subscriptions:
+            self.subscriptions.add(topic)
+            self.broker.subscribed(self, topic)
+
+    def unsubscribe(self, topic):
+        self.subscriptions.discard(topic)
+
+    def message_callback_add(self, sub, callback):
+        self.callbacks[sub] = callback
+
+    def message_callback_remove(self, sub):
+        self.callbacks.pop(sub, None)
+
+    def dispatch(self, topic, payload):
+        msg = make_message(topic, payload)
+        matched = False
+        for sub, callback in list(self.callbacks.items()):
+            if paho.topic_matches_sub(sub, topic):
+                matched = True
+                callback(self, None, msg)
+        if not matched and self.on_message is not None:
+            self.on_message(self, None, msg)
+
+    def loop_forever(self):
+        if self.on_connect is not None:
+            self.on_connect(self, None, {}, 0)
+        while True:
+            item = self.inbox.get()
+            if item is None:
+                return
+            try:
+                self.dispatch(*item)
+            finally:
+                self.broker.done()
+
+    def loop_start(self):
+        self.thread = threading.Thread(target=self.loop_forever, daemon=True)
+        self.thread.start()
+
+    def loop_stop(self):
+        self.inbox.put(None)
+
+
+def load_node(node, env=None, broker=None):
+    """
+    Imports src/<node>/run.py as a fresh module with the given environment.
+    With a broker the node's MQTTWrapper talks to the LocalBroker instead of paho.
+    The nodes read their environment at import time, afterwards os.environ is restored.
+    """
+    global _loaded
+
+    node_dir = os.path.abspath(os.path.join(SRC_DIR, node))
+    for name in list(sys.modules):
+        if name.split('.')[0] in NODE_MODULES:
+            del sys.modules[name]
+    saved_env = dict(os.environ)
+    os.environ.update(env or {})
+    sys.path.insert(0, node_dir)
+    try:
+        wrapper = importlib.import_module('mqtt.mqtt_wrapper')
+        if broker is not None:
+            wrapper.mqtt = broker.client_factory()
+        _loaded += 1
+        spec = importlib.util.spec_from_file_location(f'bench_{node}_{_loaded}', os.path.join(node_dir, 'run.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(node_dir)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, messages, warmup=0, alloc_samples=200):
+    """
+    Calls func(msg) for every message, the first warmup messages are not timed. Returns
+    throughput, latency percentiles in microseconds and the allocation figures of a
+    separate tracemalloc pass.
+    """
+    for msg in messages[:warmup]:
+        func(msg)
+    messages = messages[warmup:]
+
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for msg in messages:
+        t0 = clock()
+        func(msg)
+        latencies.append(clock() - t0)
+    total = clock() - start
+
+    latencies.sort()
+    result = {
+        "messages": len(messages),
+        "ops_per_sec": len(messages) / (total / 1e9) if total else 0.0,
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p95_us": percentile(latencies, 0.95) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+    }
+    result.update(measure_allocations(func, messages[:alloc_samples]))
+    return result
+
+
+def measure_allocations(func, messages):
+    # Peak bytes allocated while handling one message, and bytes still held afterwards
+    if not messages:
+        return {"alloc_peak_bytes": 0.0, "retained_bytes": 0.0}
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        start, _ = tracemalloc.get_traced_memory()
+        for msg in messages:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func(msg)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_bytes": peak_total / len(messages),
+            "retained_bytes": (end - start) / len(messages)}
+
+
+def best_result(runs):
+    """
+    Combines repeated runs of a benchmark. Interference from other processes only ever
+    makes a run slower, so every figure is taken from its best run: the highest rates,
+    the lowest latencies and allocations. Other values come from the fastest run.
+    """
+    result = dict(max(runs, key=lambda run: run["ops_per_sec"]))
+    for key in result:
+        if key.endswith('_per_sec'):
+            result[key] = max(run[key] for run in runs)
+        elif key.endswith('_us') or key.endswith('_bytes'):
+            result[key] = min(run[key] for run in runs)
+    result["repeats"] = len(runs)
+    return result
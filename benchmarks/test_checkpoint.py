@@ -0,0 +1,82 @@
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from harness import LocalBroker, load_node
+
+logging.disable(logging.CRITICAL)
+
+
+def wait(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'plant did not settle'
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def plant(tmp_path):
+    broker = LocalBroker()
+    nodes = {
+        'storage': load_node('storage', {'EC_NAME': 'storage_1', 'EC_MQTT_TOPIC': 'storage/1/data',
+                                         'PACKET_TYPE_1_UNIT': '3', 'PACKET_TYPE_2_UNIT': '0'}, broker),
+        'supplier': load_node('supplier', {'EC_NAME': 'supplier_1', 'EC_MQTT_TOPIC': 'supplier/1/data'}, broker),
+        'roboter': load_node('roboter', {'EC_NAME': 'roboter_1', 'EC_MQTT_TOPIC': 'roboter/1/status',
+                                         'ROBOTER_STATUS': 'ready'}, broker),
+    }
+    for node in nodes.values():
+        threading.Thread(target=node.main, daemon=True).start()
+    wait(lambda: len(broker.clients) == len(nodes) and all(c.subscriptions for c in broker.clients))
+
+    tick_gen = load_node('tick_gen', {}, broker)
+    tick_gen.CHECKPOINT_NODES = {'storage_1', 'supplier_1', 'roboter_1'}
+    tick_gen.CHECKPOINT_TIMEOUT = 5.0
+    tick_gen.CHECKPOINT_DIR = str(tmp_path)
+    mqtt = tick_gen.MQTTWrapper('mqttbroker', 1883, name='tick_generator')
+    yield broker, nodes, tick_gen, mqtt
+    broker.stop()
+
+
+def deliver(broker, package_type):
+    broker.publish('roboter/1/processed', json.dumps({"package_type": package_type}))
+    wait(broker.idle)
+
+
+def tick_state(tick_seq):
+    return {"start_epoch": 1700000000, "tick_sec": 30 * tick_seq, "tick_seq": tick_seq, "speed_factor": 10}
+
+
+def test_checkpoint_survives_broker_restart(plant, tmp_path):
+    broker, nodes, tick_gen, mqtt = plant
+    storage, supplier = nodes['storage'], nodes['supplier']
+    deliver(broker, 1)
+    assert tick_gen.take_checkpoint(mqtt, 'warm', tick_state(7))
+    assert (tmp_path / 'warm.ckpt').exists()
+
+    deliver(broker, 1)
+    deliver(broker, 1)
+    assert storage.storage_package_type_1 == 6 and supplier.supplier_package_type_1 == 97
+
+    # Ohne gehaltene Nachrichten im Broker wird vom Datenträger wiederhergestellt
+    broker.retained.clear()
+    state = tick_gen.restore_checkpoint(mqtt, 'warm')
+    wait(broker.idle)
+    assert state['tick_seq'] == 7 and state['tick'] == 6
+    assert storage.storage_package_type_1 == 4 and storage.locations.count(1) == 4
+    assert storage.received_count[1] == 1
+    assert supplier.supplier_package_type_1 == 99 and supplier.shipped_count[1] == 1
+    assert storage.last_tick_seq == 6 and supplier.last_tick_seq == 6
+
+
+def test_checkpoint_fails_without_all_snapshots(plant, tmp_path):
+    broker, nodes, tick_gen, mqtt = plant
+    tick_gen.CHECKPOINT_NODES = {'storage_1', 'supplier_1', 'roboter_1', 'roboter_9'}
+    tick_gen.CHECKPOINT_TIMEOUT = 0.2
+    assert not tick_gen.take_checkpoint(mqtt, 'partial', tick_state(3))
+    wait(broker.idle)
+    assert not (tmp_path / 'partial.ckpt').exists()
+    assert not any(topic.startswith('checkpoint/snapshot/partial/') for topic in broker.retained)
+    assert tick_gen.restore_checkpoint(mqtt, 'partial') is None
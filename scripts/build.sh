@@ -13,5 +13,11 @@ echo -e "\n\n"
 docker build ${BASE_DIR}roboter -t roboter:0.1
 echo -e "\n\n"
 
+docker build ${BASE_DIR}analytics -t analytics:0.1
+echo -e "\n\n"
+
+docker build ${BASE_DIR}aggregator -t aggregator:0.1
+echo -e "\n\n"
+
 docker build ${BASE_DIR}dashboard -t dashboard:0.1
 echo -e "\n\n"
@@ -0,0 +1,3 @@
+#!/usr/bin/env bash
+CHECKPOINT_ID=${1:-default}
+docker exec -it mqttbroker sh -c "mosquitto_pub -t 'mgmt/checkpoint' -m '${CHECKPOINT_ID}'"
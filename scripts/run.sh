@@ -7,16 +7,34 @@ docker run -d -p 127.0.0.1:8883:1883 --net=cps-net --name mqttbroker \
   eclipse-mosquitto:1.6.13
 
 echo "Starting Tick Generator..."
-docker run -d --net=cps-net --name tick_gen tick_gen:0.1
+docker run -d --net=cps-net \
+  -v cps-checkpoints:/checkpoints \
+  --name tick_gen tick_gen:0.1
 
 echo "Starting dashboard..."
 docker run -d -p 127.0.0.1:1880:1880 --net=cps-net --name dashboard dashboard:0.1
 
+echo "Starting Aggregator_1"
+docker run -d --net=cps-net \
+  -e EC_NAME='aggregator_1' \
+  -e DASHBOARD_REFRESH_SEC=1 \
+  --name aggregator_1 aggregator:0.1
+
+echo "Starting Analytics_1"
+docker run -d --net=cps-net \
+  -e EC_NAME='analytics_1' \
+  -e EC_MQTT_TOPIC='analytics/stats' \
+  -e ANALYTICS_ALERT_TOPIC='analytics/alerts' \
+  -e ANALYTICS_DISCREPANCY_TOPIC='analytics/discrepancies' \
+  --name analytics_1 analytics:0.1
+
 echo "Starting Storage_1"
 docker run -d --net=cps-net \
   -e EC_NAME='storage_1' \
   -e EC_MQTT_TOPIC='storage/1/data' \
   -e STORAGE_PROCESS_TOPIC='storage/1/processed' \
+  -e STORAGE_OCCUPANCY_TOPIC='storage/1/occupancy' \
+  -e STORAGE_PICK_POLICY='fifo' \
   -e PACKET_TYPE_1_COUNT=0 \
   -e PACKET_TYPE_2_COUNT=0 \
   --name storage_1 storage:0.1
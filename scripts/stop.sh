@@ -2,6 +2,8 @@
 
 echo "Stopping containers..."
 docker stop dashboard
+docker stop aggregator_1
+docker stop analytics_1
 docker stop roboter_1
 docker stop roboter_2
 docker stop roboter_3
@@ -12,6 +14,8 @@ docker stop mqttbroker
 
 echo -e "\nRemoving containers and network...\n"
 docker rm dashboard
+docker rm aggregator_1
+docker rm analytics_1
 docker rm roboter_1
 docker rm roboter_2
 docker rm roboter_3
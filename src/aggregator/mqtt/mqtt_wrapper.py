@@ -0,0 +1,111 @@
+import paho.mqtt.client as mqtt
+import logging
+import sys
+import threading
+
+
+class MQTTWrapper:
+    def __init__(self, broker_ip, broker_port, name='MQTTWrapper',
+                 subscriptions=None, on_message_callback=None,
+                 log_level=logging.INFO):
+        self.broker_ip = broker_ip
+        self.broker_port = broker_port
+        self.name = name
+        self.subscriptions = subscriptions
+        self.on_message_callback = on_message_callback
+        self.log_level = log_level
+
+        # Configure logging
+        self.log = logging.getLogger(self.name)
+        self.log.setLevel(self.log_level)
+        # create console handler with a higher log level
+        ch = logging.StreamHandler(sys.stderr)
+        ch.setLevel(self.log_level)
+        self.log.addHandler(ch)
+
+        # Serialises callbacks of the network loop and of the latest-only workers
+        self.callback_lock = threading.Lock()
+
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, self.name)
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+
+        self.client.connect(self.broker_ip, self.broker_port, 60)
+        
+    def loop_start(self):
+        self.client.loop_start()
+
+    def loop_forever(self):
+        self.client.loop_forever()
+
+    def publish(self, topic, message):
+        self.log.debug('publish ' + str(message) + ' to topic ' + topic)
+        self.client.publish(topic, str(message))
+
+    def subscribe(self, topic):
+        self.log.debug('subscribe to  ' + topic)
+        self.client.subscribe(topic)
+
+    def subscribe_with_callback(self, sub, callback):
+        self.client.message_callback_add(sub, self._locked(callback))
+
+    def subscribe_latest_with_callback(self, sub, callback):
+        # Latest-only delivery: messages that arrive while the callback is still
+        # busy are collapsed, the callback only sees the newest one.
+        cond = threading.Condition()
+        pending = {'userdata': None, 'msg': None, 'skipped': 0}
+
+        def enqueue(client, userdata, msg):
+            with cond:
+                if pending['msg'] is not None:
+                    pending['skipped'] += 1
+                pending['userdata'] = userdata
+                pending['msg'] = msg
+                cond.notify()
+
+        def worker():
+            while True:
+                with cond:
+                    while pending['msg'] is None:
+                        cond.wait()
+                    userdata, msg, skipped = pending['userdata'], pending['msg'], pending['skipped']
+                    pending['msg'] = None
+                    pending['skipped'] = 0
+                if skipped:
+                    self.log.debug('collapsed ' + str(skipped) + ' queued messages on ' + msg.topic)
+                with self.callback_lock:
+                    try:
+                        callback(self.client, userdata, msg)
+                    except Exception as e:
+                        # Keep the worker alive, otherwise no further message is delivered
+                        self.log.error('callback for ' + msg.topic + ' failed: ' + str(e))
+
+        threading.Thread(target=worker, name=self.name + '-' + sub, daemon=True).start()
+        self.client.message_callback_add(sub, enqueue)
+
+    def _locked(self, callback):
+        def wrapper(client, userdata, msg):
+            with self.callback_lock:
+                callback(client, userdata, msg)
+        return wrapper
+
+    # The callback for when the client receives a CONNACK response from the server.
+    def on_connect(self, client, userdata, flags, rc):
+        self.log.info("Connected to " + self.broker_ip + ":" + str(self.broker_port) + " with result code " + str(rc))
+
+        # Subscribing in on_connect() means that if we lose the connection and
+        # reconnect then subscriptions will be renewed.
+        if self.subscriptions is not None:
+            for sub in self.subscriptions:
+                self.log.info('subscribe to ' + sub)
+                self.client.subscribe(sub)
+
+    def on_message(self, client, userdata, msg):
+        if self.on_message_callback is not None:
+            self.on_message_callback(userdata, msg)
+        else:
+            self.log.debug(str(userdata) + ' - ' + msg.topic + ':'
+                + msg.payload.decode("utf-8"))
+
+    def stop(self):
+        self.client.loop_stop()
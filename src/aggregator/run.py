@@ -0,0 +1,186 @@
+import sys
+import json
+import logging
+import os
+import time
+from mqtt.mqtt_wrapper import MQTTWrapper
+
+# Logging-Konfiguration
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Name des Knotens
+NAME = os.environ.get('EC_NAME', 'aggregator_1')
+
+# Aktualisierungsintervall des Dashboards in Sekunden (Wanduhrzeit, unabhängig vom Speed-Faktor)
+REFRESH_SEC = float(os.environ.get('DASHBOARD_REFRESH_SEC', 1.0))
+
+# Abonnierte MQTT-Topics
+TICK_TOPIC = "tickgen/tick"
+ROBOTER_STATUS_TOPIC = 'roboter/+/status'
+STORAGE_DATA_TOPIC = 'storage/+/data'
+SUPPLIER_DATA_TOPIC = 'supplier/+/data'
+
+# Veröffentlichte MQTT-Topics
+DASHBOARD_TICK_TOPIC = 'dashboard/tick'
+DASHBOARD_ROBOTER_TOPIC = 'dashboard/roboter'
+DASHBOARD_STOCK_TOPIC = 'dashboard/{}'
+
+# Zustand des laufenden Intervalls
+latest_tick = None
+stock_rollups = {}
+stock_timestamps = {}
+robot_running_since = {}
+robot_running_time = {}
+interval_start = time.monotonic()
+
+# Zuletzt veröffentlichte Werte je Topic, für die Unterdrückung unveränderter Werte
+published = {}
+
+
+def on_message_tick(client, userdata, msg):
+    """
+    Callback für Tick-Nachrichten. Merkt sich nur den neuesten Tick.
+    """
+    global latest_tick
+    latest_tick = msg.payload.decode("utf-8")
+
+
+def on_roboter_status(client, userdata, msg):
+    """
+    Callback für Statusmeldungen der Roboter. Summiert die Laufzeit im aktuellen Intervall.
+    """
+    try:
+        status_info = json.loads(msg.payload.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
+        return
+
+    name = status_info.get("name", msg.topic)
+    now = time.monotonic()
+    since = robot_running_since.pop(name, None)
+    if since is not None:
+        robot_running_time[name] = robot_running_time.get(name, 0.0) + now - since
+    else:
+        robot_running_time.setdefault(name, 0.0)
+    if status_info.get("status") == "running":
+        robot_running_since[name] = now
+
+
+def on_stock_data(client, userdata, msg):
+    """
+    Callback für Bestandsmeldungen. Führt Minimum, Maximum und letzten Wert je Pakettyp.
+    """
+    try:
+        data = json.loads(msg.payload.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
+        return
+
+    node = msg.topic.rsplit('/', 1)[0]
+    rollup = stock_rollups.setdefault(node, {})
+    for key, value in data.items():
+        if not key.startswith("package_type_"):
+            continue
+        if key in rollup:
+            current = rollup[key]
+            current["min"] = min(current["min"], value)
+            current["max"] = max(current["max"], value)
+            current["last"] = value
+        else:
+            rollup[key] = {"min": value, "max": value, "last": value}
+    stock_timestamps[node] = data.get("timestamp")
+
+
+def publish_changed(client, topic, values, **extra):
+    """
+    Veröffentlicht nur, wenn sich die Werte seit der letzten Veröffentlichung geändert haben.
+    Zusätzliche Felder wie der Zeitstempel werden mitgesendet, zählen aber nicht als Änderung.
+    """
+    if published.get(topic) == values:
+        return
+    published[topic] = values
+    payload = dict(values)
+    payload.update(extra)
+    client.publish(topic, json.dumps(payload))
+
+
+def flush(client):
+    """
+    Veröffentlicht die Rollups des abgelaufenen Intervalls und startet ein neues.
+    """
+    global interval_start
+
+    now = time.monotonic()
+    elapsed = max(now - interval_start, 1e-9)
+    interval_start = now
+
+    if latest_tick is not None and published.get(DASHBOARD_TICK_TOPIC) != latest_tick:
+        published[DASHBOARD_TICK_TOPIC] = latest_tick
+        client.publish(DASHBOARD_TICK_TOPIC, latest_tick)
+
+    for node, rollup in stock_rollups.items():
+        publish_changed(client, DASHBOARD_STOCK_TOPIC.format(node), dict(rollup),
+                        timestamp=stock_timestamps.get(node))
+        # Das nächste Intervall beginnt beim letzten Wert
+        for key, current in rollup.items():
+            rollup[key] = {"min": current["last"], "max": current["last"], "last": current["last"]}
+
+    utilisation = {}
+    for name in robot_running_time:
+        running = robot_running_time[name]
+        if name in robot_running_since:
+            running += now - robot_running_since[name]
+            robot_running_since[name] = now
+        utilisation[name] = round(min(running / elapsed, 1.0), 2)
+        robot_running_time[name] = 0.0
+    if utilisation:
+        publish_changed(client, DASHBOARD_ROBOTER_TOPIC, utilisation)
+
+
+def main():
+    """
+    Main function to initialize the MQTT client and publish the rollups at a fixed rate.
+    """
+    logger.info(f"Initializing MQTT client with name: {NAME}")
+    logger.info(f"Publishing dashboard rollups every {REFRESH_SEC} s")
+
+    mqtt = MQTTWrapper('mqttbroker', 1883, name=NAME)
+
+    mqtt.subscribe(TICK_TOPIC)
+    mqtt.subscribe_with_callback(TICK_TOPIC, on_message_tick)
+
+    mqtt.subscribe(ROBOTER_STATUS_TOPIC)
+    mqtt.subscribe_with_callback(ROBOTER_STATUS_TOPIC, on_roboter_status)
+
+    mqtt.subscribe(STORAGE_DATA_TOPIC)
+    mqtt.subscribe_with_callback(STORAGE_DATA_TOPIC, on_stock_data)
+
+    mqtt.subscribe(SUPPLIER_DATA_TOPIC)
+    mqtt.subscribe_with_callback(SUPPLIER_DATA_TOPIC, on_stock_data)
+
+    try:
+        logger.info("Starting MQTT loop...")
+        mqtt.loop_start()
+        while True:
+            time.sleep(REFRESH_SEC)
+            with mqtt.callback_lock:
+                flush(mqtt.client)
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("KeyboardInterrupt detected, shutting down gracefully.")
+        mqtt.stop()
+        sys.exit("Shutdown complete.")
+    except Exception as e:
+        logger.error(f"Ein unerwarteter Fehler ist aufgetreten: {e}")
+        mqtt.stop()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
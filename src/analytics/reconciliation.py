@@ -0,0 +1,119 @@
+SUPPLIER = 'supplier'
+STORAGE = 'storage'
+
+# Bestätigungsströme: Einlagerung (roboter/1|2/processed) und Auslagerung (roboter/3/processed)
+DELIVERED = 'delivered'
+REMOVED = 'removed'
+
+
+class Reconciler:
+    """
+    Gleicht die Bestandsführung von Supplier und Lager laufend mit den
+    Verarbeitungsbestätigungen der Roboter ab.
+
+    Je Ledger und Pakettyp wird eine Bilanz aus den Bestandsmeldungen geführt:
+    beim Supplier die Summe der Abgänge, beim Lager die Bestandsänderung. Jede
+    Meldung enthält zusätzlich die Zahl der Bestätigungen, die das Ledger bis dahin
+    angewendet hat. Die Bilanz muss genau dazu passen, die angewendeten Bestätigungen
+    wiederum zu den hier empfangenen, wobei Bestätigungen, die zwischen zwei
+    Meldungen noch unterwegs sind, nicht als Abweichung zählen. Jede Meldung kostet O(1).
+    """
+
+    def __init__(self):
+        self.seen = {DELIVERED: {}, REMOVED: {}}
+        self.ledgers = {}
+
+    def on_delivered(self, package_type):
+        self.seen[DELIVERED][package_type] = self.seen[DELIVERED].get(package_type, 0) + 1
+
+    def on_removed(self, package_type):
+        self.seen[REMOVED][package_type] = self.seen[REMOVED].get(package_type, 0) + 1
+
+    def update(self, ledger, kind, package_type, tick, value, applied):
+        """
+        Verarbeitet einen veröffentlichten Bestand. applied enthält je Bestätigungsstrom
+        die Zahl der vom Ledger angewendeten Bestätigungen, z.B. {DELIVERED: 3, REMOVED: 1}.
+        Gibt eine Abweichungsmeldung zurück, wenn eine Abweichung beginnt, sich ändert
+        oder endet, sonst None.
+        """
+        key = (ledger, package_type)
+        state = self.ledgers.get(key)
+        if state is None:
+            self._start(key, package_type, tick, value, applied)
+            return None
+        if self._restarted(state, tick, applied):
+            # Nach einem Restore beginnt der Abgleich des Ledgers von vorn, eine offene Abweichung endet
+            self._start(key, package_type, tick, value, applied)
+            if state["difference"] == 0:
+                return None
+            return self._event(ledger, package_type, 0, 0, 0, 0, state["since"], tick)
+
+        state["tick"] = tick
+        if kind == SUPPLIER:
+            # Ein gestiegener Bestand ist eine Nachlieferung, die erst bei Bestand 0 erfolgt
+            previous = state["last"]
+            state["balance"] += previous - value if value <= previous else previous
+        else:
+            state["balance"] = value - state["initial"]
+        state["last"] = value
+
+        expected = 0
+        applied_total = 0
+        for stream, count in applied.items():
+            counts = state["streams"][stream]
+            done = count - counts["base_applied"]
+            seen = self.seen[stream].get(package_type, 0) - counts["base_seen"]
+            # Bestätigungen, die vor der letzten Meldung empfangen wurden, muss das Ledger
+            # angewendet haben; seit der letzten Meldung angewendete darf es vor uns kennen
+            lower = counts["seen"]
+            upper = seen + done - counts["applied"]
+            counts["applied"], counts["seen"] = done, seen
+            sign = -1 if stream == REMOVED else 1
+            expected += sign * min(max(done, lower), upper)
+            applied_total += sign * done
+
+        # Eine Abweichung wird mit dem ersten abweichenden Schnappschuss gemeldet und
+        # beendet, sobald ein späterer Schnappschuss wieder passt
+        difference = state["balance"] - expected
+        if difference == state["difference"]:
+            return None
+
+        if state["since"] is None:
+            state["since"] = tick
+        event = self._event(ledger, package_type, expected, applied_total, state["balance"], difference,
+                            state["since"], tick)
+        state["difference"] = difference
+        if difference == 0:
+            state["since"] = None
+        return event
+
+    def _start(self, key, package_type, tick, value, applied):
+        self.ledgers[key] = {
+            "initial": value, "last": value, "tick": tick, "balance": 0, "difference": 0, "since": None,
+            "streams": {stream: {"base_applied": count,
+                                 "base_seen": self.seen[stream].get(package_type, 0),
+                                 "applied": 0, "seen": 0}
+                        for stream, count in applied.items()}
+        }
+
+    @staticmethod
+    def _restarted(state, tick, applied):
+        # Zurückgesetzte Zähler oder ein früherer Tick bedeuten einen wiederhergestellten Checkpoint
+        if tick is not None and state["tick"] is not None and tick < state["tick"]:
+            return True
+        return any(count < state["streams"][stream]["base_applied"] + state["streams"][stream]["applied"]
+                   for stream, count in applied.items())
+
+    @staticmethod
+    def _event(ledger, package_type, expected, applied, actual, difference, since, tick):
+        return {
+            "ledger": ledger,
+            "package_type": package_type,
+            "expected": expected,
+            "applied": applied,
+            "actual": actual,
+            "difference": difference,
+            "active": difference != 0,
+            "from_tick": since,
+            "to_tick": tick
+        }
@@ -0,0 +1,244 @@
+import sys
+import json
+import logging
+import os
+from mqtt.mqtt_wrapper import MQTTWrapper
+from mqtt.tick import decode_tick
+from window import RingWindow
+from reconciliation import Reconciler, SUPPLIER, STORAGE, DELIVERED, REMOVED
+
+# Logging-Konfiguration
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Name des Knotens
+NAME = os.environ.get('EC_NAME', 'analytics_1')
+
+# MQTT-Topics für Statistiken und Alarme
+STATS_TOPIC = os.environ.get('EC_MQTT_TOPIC', 'analytics/stats')
+ALERT_TOPIC = os.environ.get('ANALYTICS_ALERT_TOPIC', 'analytics/alerts')
+DISCREPANCY_TOPIC = os.environ.get('ANALYTICS_DISCREPANCY_TOPIC', 'analytics/discrepancies')
+
+# Abonnierte MQTT-Topics
+TICK_TOPIC = "tickgen/tick"
+ROBOTER_STATUS_TOPIC = 'roboter/+/status'
+ROBOTER_PROCESS_TOPIC = 'roboter/+/processed'
+STORAGE_DATA_TOPIC = 'storage/+/data'
+SUPPLIER_DATA_TOPIC = 'supplier/+/data'
+
+# Bestätigungen für Einlagerung (vom Supplier) und Auslagerung (aus dem Lager)
+DELIVERED_TOPICS = ('roboter/1/processed', 'roboter/2/processed')
+REMOVED_TOPICS = ('roboter/3/processed',)
+
+# Fenstergröße in Ticks, Ticks bis ein laufender Roboter als hängend gilt,
+# Vorhersagehorizont in Ticks für abdriftende Bestände
+WINDOW_TICKS = int(os.environ.get('ANALYTICS_WINDOW', 20))
+STUCK_TICKS = int(os.environ.get('ANALYTICS_STUCK_TICKS', 10))
+DRIFT_HORIZON = int(os.environ.get('ANALYTICS_DRIFT_HORIZON', 10))
+
+# Mindestgefälle pro Meldung für einen Drift-Alarm und Zahl aufeinanderfolgender
+# Meldungen, die ein Drift-Alarm zum Ein- bzw. Ausschalten braucht
+DRIFT_MIN_SLOPE = float(os.environ.get('ANALYTICS_DRIFT_MIN_SLOPE', 0.1))
+DRIFT_CONFIRM = int(os.environ.get('ANALYTICS_DRIFT_CONFIRM', 3))
+
+# Zustand je Datenstrom
+robot_status = {}
+robot_running_ticks = {}
+utilisation = {}
+processed_count = {}
+throughput = {}
+stock = {}
+active_alerts = set()
+alert_streaks = {}
+reconciler = Reconciler()
+
+last_tick_seq = None
+
+
+def window(streams, key):
+    if key not in streams:
+        streams[key] = RingWindow(WINDOW_TICKS)
+    return streams[key]
+
+
+def raise_alert(client, kind, stream, active, **details):
+    """
+    Veröffentlicht einen Alarm beim Eintreten und beim Ende einer Anomalie, nicht bei jedem Tick.
+    """
+    key = (kind, stream)
+    if active == (key in active_alerts):
+        return
+    if active:
+        active_alerts.add(key)
+    else:
+        active_alerts.discard(key)
+    alert = {"type": kind, "stream": stream, "active": active, "tick": last_tick_seq}
+    alert.update(details)
+    client.publish(ALERT_TOPIC, json.dumps(alert))
+    logger.warning(f"Alarm: {alert}")
+
+
+def debounce(kind, stream, condition, confirm):
+    """
+    Hysterese für Alarme: Der Zustand wechselt erst, wenn die Bedingung bei
+    confirm aufeinanderfolgenden Meldungen vom aktuellen Zustand abweicht.
+    """
+    key = (kind, stream)
+    active = key in active_alerts
+    if condition == active:
+        alert_streaks[key] = 0
+        return active
+    alert_streaks[key] = alert_streaks.get(key, 0) + 1
+    return condition if alert_streaks[key] >= confirm else active
+
+
+def on_message_tick(client, userdata, msg):
+    """
+    Callback für Tick-Nachrichten. Schreibt Auslastung und Durchsatz je Tick in die Fenster
+    und veröffentlicht die Statistiken.
+    """
+    global last_tick_seq
+
+    tick = decode_tick(msg.payload)
+    ticks = max(1, min(tick.seq - last_tick_seq, WINDOW_TICKS)) if last_tick_seq is not None else 1
+    last_tick_seq = tick.seq
+
+    for name, status in robot_status.items():
+        running = status == "running"
+        for _ in range(ticks):
+            window(utilisation, name).push(1.0 if running else 0.0)
+        robot_running_ticks[name] = robot_running_ticks.get(name, 0) + ticks if running else 0
+        raise_alert(client, "robot_stuck", name, robot_running_ticks[name] >= STUCK_TICKS,
+                    running_ticks=robot_running_ticks[name])
+
+    for topic, count in processed_count.items():
+        # Bei übersprungenen Ticks verteilt sich der Durchsatz gleichmäßig
+        for _ in range(ticks):
+            window(throughput, topic).push(count / ticks)
+        processed_count[topic] = 0
+
+    stats = {
+        "tick": tick.seq,
+        "utilisation": {name: w.mean() for name, w in utilisation.items()},
+        "throughput": {topic: w.mean() for topic, w in throughput.items()},
+        "stock": {name: {"last": w.last(), "mean": w.mean(), "slope": w.slope()} for name, w in stock.items()}
+    }
+    client.publish(STATS_TOPIC, json.dumps(stats))
+
+
+def on_roboter_status(client, userdata, msg):
+    """
+    Callback für Statusmeldungen der Roboter.
+    """
+    try:
+        status_info = json.loads(msg.payload.decode("utf-8"))
+        robot_status[status_info.get("name", msg.topic)] = status_info.get("status")
+    except Exception as e:
+        logger.error(f"Fehler beim Verarbeiten des Roboterstatus: {e}")
+
+
+def on_package_processed(client, userdata, msg):
+    """
+    Callback für Verarbeitungsbestätigungen. Zählt verarbeitete Pakete bis zum nächsten Tick
+    und führt die Bestätigungen für den Bestandsabgleich.
+    """
+    processed_count[msg.topic] = processed_count.get(msg.topic, 0) + 1
+
+    try:
+        package_type = json.loads(msg.payload.decode("utf-8")).get("package_type")
+    except json.JSONDecodeError as e:
+        logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
+        return
+    if msg.topic in DELIVERED_TOPICS:
+        reconciler.on_delivered(package_type)
+    elif msg.topic in REMOVED_TOPICS:
+        reconciler.on_removed(package_type)
+
+
+def on_stock_data(client, userdata, msg):
+    """
+    Callback für Bestandsmeldungen von Lager und Supplier. Prüft auf negative oder
+    in Richtung negativ abdriftende Bestände und gleicht beide Ledger mit den Bestätigungen ab.
+    """
+    try:
+        data = json.loads(msg.payload.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
+        return
+
+    node = msg.topic.rsplit('/', 1)[0]
+    kind = SUPPLIER if node.startswith(SUPPLIER) else STORAGE
+    try:
+        for key, value in data.items():
+            if not key.startswith("package_type_"):
+                continue
+            name = f"{node}/{key}"
+            w = window(stock, name)
+            w.push(float(value))
+            raise_alert(client, "stock_negative", name, value < 0, value=value)
+            slope = w.slope()
+            projected = w.last() + slope * DRIFT_HORIZON
+            settled = len(w) >= WINDOW_TICKS // 2
+            drifting = settled and value >= 0 and slope <= -DRIFT_MIN_SLOPE and projected < 0
+            raise_alert(client, "stock_drift", name, debounce("stock_drift", name, drifting, DRIFT_CONFIRM),
+                        value=value, slope=slope)
+
+            package_type = key.rsplit('_', 1)[1]
+            if kind == SUPPLIER:
+                applied = {DELIVERED: data.get(f"shipped_{package_type}", 0)}
+            else:
+                applied = {DELIVERED: data.get(f"received_{package_type}", 0),
+                           REMOVED: data.get(f"removed_{package_type}", 0)}
+            discrepancy = reconciler.update(node, kind, int(package_type), data.get("tick"), value, applied)
+            if discrepancy is not None:
+                client.publish(DISCREPANCY_TOPIC, json.dumps(discrepancy))
+                logger.warning(f"Bestandsabweichung: {discrepancy}")
+    except Exception as e:
+        logger.error(f"Fehler beim Verarbeiten der Bestandsmeldung: {e}")
+
+
+def main():
+    """
+    Main function to initialize the MQTT client and start the event loop.
+    """
+    logger.info(f"Initializing MQTT client with name: {NAME}")
+    logger.info(f"Publishing statistics to topic: {STATS_TOPIC}, alerts to topic: {ALERT_TOPIC}")
+
+    mqtt = MQTTWrapper('mqttbroker', 1883, name=NAME)
+
+    mqtt.subscribe(TICK_TOPIC)
+    mqtt.subscribe_latest_with_callback(TICK_TOPIC, on_message_tick)
+
+    mqtt.subscribe(ROBOTER_STATUS_TOPIC)
+    mqtt.subscribe_with_callback(ROBOTER_STATUS_TOPIC, on_roboter_status)
+
+    mqtt.subscribe(ROBOTER_PROCESS_TOPIC)
+    mqtt.subscribe_with_callback(ROBOTER_PROCESS_TOPIC, on_package_processed)
+
+    mqtt.subscribe(STORAGE_DATA_TOPIC)
+    mqtt.subscribe_with_callback(STORAGE_DATA_TOPIC, on_stock_data)
+
+    mqtt.subscribe(SUPPLIER_DATA_TOPIC)
+    mqtt.subscribe_with_callback(SUPPLIER_DATA_TOPIC, on_stock_data)
+
+    try:
+        logger.info("Starting MQTT loop...")
+        mqtt.loop_forever()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("KeyboardInterrupt detected, shutting down gracefully.")
+        mqtt.stop()
+        sys.exit("Shutdown complete.")
+    except Exception as e:
+        logger.error(f"Ein unerwarteter Fehler ist aufgetreten: {e}")
+        mqtt.stop()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
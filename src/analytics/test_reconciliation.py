@@ -0,0 +1,103 @@
+from reconciliation import Reconciler, SUPPLIER, STORAGE, DELIVERED, REMOVED
+
+
+def supplier_update(reconciler, tick, value, shipped):
+    return reconciler.update('supplier/1', SUPPLIER, 1, tick, value, {DELIVERED: shipped})
+
+
+def storage_update(reconciler, tick, value, received, removed):
+    return reconciler.update('storage/1', STORAGE, 1, tick, value, {DELIVERED: received, REMOVED: removed})
+
+
+def test_consistent_ledgers_report_nothing():
+    reconciler = Reconciler()
+    assert supplier_update(reconciler, 0, 10, 0) is None
+    assert storage_update(reconciler, 0, 0, 0, 0) is None
+    for tick in range(1, 6):
+        reconciler.on_delivered(1)
+        reconciler.on_removed(1)
+        assert supplier_update(reconciler, tick, 10 - tick, tick) is None
+        assert storage_update(reconciler, tick, 0, tick, tick) is None
+
+
+def test_restock_is_not_counted_as_shipment():
+    reconciler = Reconciler()
+    supplier_update(reconciler, 0, 1, 0)
+    reconciler.on_delivered(1)
+    # Bestand 1 -> 0 durch die Bestätigung, danach Nachlieferung auf 100
+    assert supplier_update(reconciler, 1, 100, 1) is None
+    assert supplier_update(reconciler, 2, 100, 1) is None
+    assert reconciler.ledgers[('supplier/1', 1)]["balance"] == 1
+
+
+def test_confirmations_in_flight_are_not_discrepancies():
+    reconciler = Reconciler()
+    supplier_update(reconciler, 0, 10, 0)
+    # Bestätigung hier empfangen, im Schnappschuss des Ledgers aber noch nicht angewendet
+    reconciler.on_delivered(1)
+    assert supplier_update(reconciler, 1, 10, 0) is None
+    assert supplier_update(reconciler, 2, 9, 1) is None
+    # Vom Ledger angewendet, hier aber noch nicht empfangen
+    assert supplier_update(reconciler, 3, 8, 2) is None
+    reconciler.on_delivered(1)
+    assert supplier_update(reconciler, 4, 8, 2) is None
+
+
+def test_lost_confirmation_is_reported_within_one_tick():
+    reconciler = Reconciler()
+    storage_update(reconciler, 0, 0, 0, 0)
+    reconciler.on_delivered(1)
+    # Die Bestätigung darf beim ersten Schnappschuss noch unterwegs sein
+    assert storage_update(reconciler, 1, 0, 0, 0) is None
+    event = storage_update(reconciler, 2, 0, 0, 0)
+    assert event["active"] and event["difference"] == -1
+    assert event["expected"] == 1 and event["actual"] == 0
+    assert event["from_tick"] == 2 and event["to_tick"] == 2
+    assert storage_update(reconciler, 3, 0, 0, 0) is None
+
+    event = storage_update(reconciler, 4, 1, 1, 0)
+    assert not event["active"] and event["difference"] == 0
+    assert event["from_tick"] == 2 and event["to_tick"] == 4
+
+
+def test_stock_not_matching_applied_confirmations_is_reported():
+    reconciler = Reconciler()
+    storage_update(reconciler, 0, 5, 0, 0)
+    reconciler.on_delivered(1)
+    event = storage_update(reconciler, 1, 7, 1, 0)
+    assert event["active"] and event["difference"] == 1
+    assert event["applied"] == 1 and event["actual"] == 2
+    assert event["from_tick"] == 1
+
+
+def test_deviation_ends_with_next_matching_snapshot():
+    reconciler = Reconciler()
+    storage_update(reconciler, 0, 5, 0, 0)
+    event = storage_update(reconciler, 1, 6, 0, 0)
+    assert event["active"] and event["from_tick"] == 1
+    event = storage_update(reconciler, 2, 5, 0, 0)
+    assert not event["active"] and event["from_tick"] == 1 and event["to_tick"] == 2
+    assert storage_update(reconciler, 3, 5, 0, 0) is None
+
+
+def test_restore_starts_a_new_baseline():
+    reconciler = Reconciler()
+    storage_update(reconciler, 0, 0, 0, 0)
+    for tick in range(1, 6):
+        reconciler.on_delivered(1)
+        assert storage_update(reconciler, tick, tick, tick, 0) is None
+    # Restore auf einen Checkpoint mit Bestand 2 und 2 angewendeten Bestätigungen
+    assert storage_update(reconciler, 6, 2, 2, 0) is None
+    reconciler.on_delivered(1)
+    assert storage_update(reconciler, 7, 3, 3, 0) is None
+    assert storage_update(reconciler, 8, 3, 3, 0) is None
+
+
+def test_restore_ends_open_discrepancy():
+    reconciler = Reconciler()
+    storage_update(reconciler, 10, 0, 0, 0)
+    assert storage_update(reconciler, 11, 1, 0, 0)["active"]
+    # Der Checkpoint liegt vor dem letzten Tick, die Zähler sind unverändert
+    event = storage_update(reconciler, 4, 0, 0, 0)
+    assert not event["active"] and event["from_tick"] == 11 and event["to_tick"] == 4
+    assert storage_update(reconciler, 5, 0, 0, 0) is None
@@ -0,0 +1,50 @@
+import numpy as np
+
+from window import RingWindow
+
+
+def test_empty_window():
+    w = RingWindow(4)
+    assert len(w) == 0
+    assert w.last() == 0.0 and w.mean() == 0.0 and w.slope() == 0.0
+
+
+def test_mean_and_last_after_wraparound():
+    w = RingWindow(3)
+    for value in (1, 2, 3, 4, 5):
+        w.push(value)
+    assert len(w) == 3
+    assert w.last() == 5
+    assert w.mean() == 4
+
+
+def test_slope_matches_least_squares_fit():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=50)
+    w = RingWindow(7)
+    for i, value in enumerate(values):
+        w.push(value)
+        window = values[max(0, i - 6):i + 1]
+        if len(window) >= 2:
+            expected = np.polyfit(np.arange(len(window)), window, 1)[0]
+            assert abs(w.slope() - expected) < 1e-9
+
+
+def test_slope_of_constant_and_linear_series():
+    w = RingWindow(5)
+    for _ in range(8):
+        w.push(3.0)
+    assert w.slope() == 0.0
+    for i in range(8):
+        w.push(10 - 2 * i)
+    assert abs(w.slope() + 2) < 1e-9
+
+
+def test_slope_is_exact_after_many_pushes():
+    w = RingWindow(5)
+    # Fenster nach 10^9 geschriebenen Werten, alle Werte bisher 0
+    w.count = 10 ** 9
+    for i in range(5):
+        w.push(3.0 * i)
+    assert abs(w.slope() - 3.0) < 1e-12
+    assert w.mean() == 6.0
@@ -0,0 +1,52 @@
+from array import array
+
+
+class RingWindow:
+    """
+    Gleitendes Fenster fester Größe über einem Ringpuffer.
+    Laufende Summen halten push, mean und slope bei O(1), der Speicher ist fest.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array('d', bytes(8 * size))
+        self.count = 0
+        self.sum = 0.0
+        # Summe von x * y, x ist die Position im Fenster (0 = ältester Wert)
+        self.sum_xy = 0.0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def push(self, value):
+        i = self.count % self.size
+        if self.count >= self.size:
+            # Ältester Wert hat x = 0, alle übrigen rücken eine Position nach vorn
+            self.sum -= self.values[i]
+            self.sum_xy -= self.sum
+            x = self.size - 1
+        else:
+            x = self.count
+        self.values[i] = value
+        self.sum += value
+        self.sum_xy += x * value
+        self.count += 1
+
+    def last(self):
+        return self.values[(self.count - 1) % self.size] if self.count else 0.0
+
+    def mean(self):
+        n = len(self)
+        return self.sum / n if n else 0.0
+
+    def slope(self):
+        """
+        Steigung der Regressionsgeraden über das Fenster (Änderung pro Wert).
+        """
+        n = len(self)
+        if n < 2:
+            return 0.0
+        # x = 0 .. n-1, unabhängig davon, wie viele Werte bisher geschrieben wurden
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self.sum_xy - sum_x * self.sum) / (n * sum_xx - sum_x * sum_x)
@@ -0,0 +1,46 @@
+import json
+import zlib
+
+# Checkpoint protocol, coordinated by the tick generator at a tick boundary:
+#   mgmt/checkpoint <id>      -> tick generator publishes a request on CHECKPOINT_REQUEST_TOPIC
+#   checkpoint/request        -> every node publishes its snapshot retained on SNAPSHOT_TOPIC
+#   mgmt/restore <id>         -> tick generator collects the snapshots and sends each
+#                                node its own one on RESTORE_TOPIC
+CHECKPOINT_COMMAND_TOPIC = 'mgmt/checkpoint'
+RESTORE_COMMAND_TOPIC = 'mgmt/restore'
+CHECKPOINT_REQUEST_TOPIC = 'checkpoint/request'
+SNAPSHOT_TOPIC = 'checkpoint/snapshot/{}/{}'
+RESTORE_TOPIC = 'checkpoint/restore/{}'
+
+
+def encode_snapshot(state):
+    return zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_snapshot(payload):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def enable_checkpoints(mqtt, snapshot, restore):
+    """
+    Registers a node for the checkpoint protocol. snapshot() returns the node
+    state as a dict, restore(state) applies a previously taken one.
+    """
+    def on_request(client, userdata, msg):
+        request = json.loads(msg.payload.decode('utf-8'))
+        state = snapshot()
+        state['tick'] = request['tick']
+        client.publish(SNAPSHOT_TOPIC.format(request['id'], mqtt.name),
+                       encode_snapshot(state), qos=1, retain=True)
+        mqtt.log.info('checkpoint ' + request['id'] + ' taken at tick ' + str(request['tick']))
+
+    def on_restore(client, userdata, msg):
+        state = decode_snapshot(msg.payload)
+        restore(state)
+        mqtt.log.info('restored checkpoint at tick ' + str(state['tick']))
+
+    restore_topic = RESTORE_TOPIC.format(mqtt.name)
+    mqtt.subscribe(CHECKPOINT_REQUEST_TOPIC)
+    mqtt.subscribe_with_callback(CHECKPOINT_REQUEST_TOPIC, on_request)
+    mqtt.subscribe(restore_topic)
+    mqtt.subscribe_with_callback(restore_topic, on_restore)
@@ -4,6 +4,7 @@ import logging
 import os
 import time
 from mqtt.mqtt_wrapper import MQTTWrapper
+from mqtt.checkpoint import enable_checkpoints
 
 
 
@@ -134,6 +135,21 @@ def to_sub(mqtt):
         sys.exit(1)
 
 
+def snapshot_state():
+    """
+    Zustand des Roboters für einen Checkpoint. Pakete werden im Netzwerk-Thread
+    verarbeitet, ein Checkpoint sieht den Roboter daher nie mitten in einer Verarbeitung.
+    """
+    return {"status": roboter_status}
+
+
+def restore_state(client, state):
+    """
+    Stellt den Status des Roboters wieder her.
+    """
+    set_status(client, state["status"])
+
+
 def main():
     global first_connection, roboter_map
     """
@@ -145,6 +161,7 @@ def main():
 
     mqtt = MQTTWrapper('mqttbroker', 1883, name=NAME)
     to_sub(mqtt)
+    enable_checkpoints(mqtt, snapshot_state, lambda state: restore_state(mqtt.client, state))
 
     # Starte die MQTT-Schleife
     try:
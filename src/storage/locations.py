@@ -0,0 +1,80 @@
+import heapq
+from collections import deque
+
+FIFO = 'fifo'
+LIFO = 'lifo'
+
+
+class StorageLocations:
+    """
+    Lagerplatzverwaltung: Regale (racks) mit Fächern (bins) fester Kapazität.
+
+    Freie Fächer liegen in einem Min-Heap über den Fachindex, Einlagerung
+    belegt immer das vorderste Fach mit freiem Platz. Pro Pakettyp merkt sich
+    eine Deque die Fächer in Einlagerungsreihenfolge, Auslagerung entnimmt
+    je nach Strategie das älteste (FIFO) oder jüngste (LIFO) Paket.
+    Einlagerung und Auslagerung kosten O(log n) bei n Fächern.
+    """
+
+    def __init__(self, racks, bins_per_rack, bin_capacity, pick_policy=FIFO):
+        if pick_policy not in (FIFO, LIFO):
+            raise ValueError(f"Unbekannte Auslagerungsstrategie: {pick_policy}")
+        self.racks = racks
+        self.bins_per_rack = bins_per_rack
+        self.bin_capacity = bin_capacity
+        self.pick_policy = pick_policy
+
+        size = racks * bins_per_rack
+        self.occupied = [0] * size
+        # Aufsteigend sortierte Liste ist bereits ein gültiger Heap
+        self.free_bins = list(range(size)) if bin_capacity > 0 else []
+        self.packages = {}
+
+    def location(self, index):
+        rack, bin_ = divmod(index, self.bins_per_rack)
+        return {"rack": rack, "bin": bin_,
+                "occupied": self.occupied[index], "capacity": self.bin_capacity}
+
+    def put_away(self, package_type):
+        """
+        Lagert ein Paket ein. Gibt den Fachindex zurück oder None, wenn das Lager voll ist.
+        """
+        if not self.free_bins:
+            return None
+        index = self.free_bins[0]
+        self.occupied[index] += 1
+        if self.occupied[index] == self.bin_capacity:
+            heapq.heappop(self.free_bins)
+        self.packages.setdefault(package_type, deque()).append(index)
+        return index
+
+    def pick(self, package_type):
+        """
+        Lagert ein Paket aus. Gibt den Fachindex zurück oder None, wenn kein Paket des Typs vorhanden ist.
+        """
+        queue = self.packages.get(package_type)
+        if not queue:
+            return None
+        index = queue.popleft() if self.pick_policy == FIFO else queue.pop()
+        if self.occupied[index] == self.bin_capacity:
+            heapq.heappush(self.free_bins, index)
+        self.occupied[index] -= 1
+        return index
+
+    def count(self, package_type):
+        return len(self.packages.get(package_type, ()))
+
+    def snapshot(self):
+        """
+        Belegte Fächer je Pakettyp in Einlagerungsreihenfolge.
+        """
+        return {str(t): list(queue) for t, queue in self.packages.items()}
+
+    def restore(self, packages):
+        self.occupied = [0] * len(self.occupied)
+        self.packages = {}
+        for t, bins in packages.items():
+            self.packages[int(t)] = deque(bins)
+            for index in bins:
+                self.occupied[index] += 1
+        self.free_bins = [i for i, n in enumerate(self.occupied) if n < self.bin_capacity]
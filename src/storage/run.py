@@ -3,6 +3,9 @@ import json
 import logging
 import os
 from mqtt.mqtt_wrapper import MQTTWrapper
+from mqtt.tick import decode_tick
+from mqtt.checkpoint import enable_checkpoints
+from locations import StorageLocations
 
 # Logging-Konfiguration
 logging.basicConfig(
@@ -20,6 +23,9 @@ NAME = os.environ['EC_NAME']
 # MQTT-Topic für veröffentlichten Bestand
 DATA_TOPIC = os.environ['EC_MQTT_TOPIC']
 
+# MQTT-Topic für Belegungsänderungen einzelner Lagerfächer
+OCCUPANCY_TOPIC = os.environ.get('STORAGE_OCCUPANCY_TOPIC', 'storage/1/occupancy')
+
 # Abonnierte MQTT-Topics
 TICK_TOPIC = "tickgen/tick"
 ROBOTER_1_PROCESS_TOPIC = 'roboter/1/processed'
@@ -30,19 +36,54 @@ ROBOTER_3_PROCESS_TOPIC = 'roboter/3/processed'
 storage_package_type_1 = int(os.environ.get('PACKET_TYPE_1_UNIT', 0))
 storage_package_type_2 = int(os.environ.get('PACKET_TYPE_2_UNIT', 0))
 
+# Lagerplätze: Regale, Fächer pro Regal, Kapazität pro Fach
+locations = StorageLocations(
+    int(os.environ.get('STORAGE_RACKS', 10)),
+    int(os.environ.get('STORAGE_BINS_PER_RACK', 50)),
+    int(os.environ.get('STORAGE_BIN_CAPACITY', 4)),
+    os.environ.get('STORAGE_PICK_POLICY', 'fifo')
+)
+for _ in range(storage_package_type_1):
+    locations.put_away(1)
+for _ in range(storage_package_type_2):
+    locations.put_away(2)
+# Nur Pakete, die ein Fach bekommen haben, zählen zum Bestand
+storage_package_type_1 = locations.count(1)
+storage_package_type_2 = locations.count(2)
+
+# Angewendete Bestätigungen je Pakettyp, für den Bestandsabgleich
+received_count = {1: 0, 2: 0}
+removed_count = {1: 0, 2: 0}
+
+# Sequenznummer des zuletzt verarbeiteten Ticks
+last_tick_seq = None
+
 
 def on_message_tick(client, userdata, msg):
     """
-    Callback für Tick-Nachrichten. Sendet Anfragen an Roboter, wenn Pakete verfügbar sind.
+    Callback für Tick-Nachrichten. Veröffentlicht den aktuellen Bestand.
+    Bei Latest-only-Zustellung steht ein Tick für alle übersprungenen Ticks davor.
     """
-    ts_iso = msg.payload.decode("utf-8")
-    logger.info(f"Tick empfangen mit Timestamp: {ts_iso}")
+    global last_tick_seq
+
+    tick = decode_tick(msg.payload)
+    skipped = tick.seq - last_tick_seq - 1 if last_tick_seq is not None else 0
+    last_tick_seq = tick.seq
+    if skipped > 0:
+        logger.info(f"Tick {tick.seq} empfangen, {skipped} Ticks übersprungen")
+    else:
+        logger.info(f"Tick {tick.seq} empfangen")
 
     # Nur aktuelle Bestände veröffentlichen, ohne sie zu ändern
     data = {
         "package_type_1": storage_package_type_1,
         "package_type_2": storage_package_type_2,
-        "timestamp": ts_iso
+        "received_1": received_count[1],
+        "received_2": received_count[2],
+        "removed_1": removed_count[1],
+        "removed_2": removed_count[2],
+        "timestamp": tick.epoch,
+        "tick": tick.seq
     }
     client.publish(DATA_TOPIC, json.dumps(data))
     logger.info(f"Bestand veröffentlicht (vor Verarbeitung): {data}")
@@ -58,20 +99,38 @@ def remove_package_from_storage(client, userdata, msg):
         package_type = processed_info.get("package_type", "unknown")
         logger.info(f"Bestätigung vom Roboter empfangen: {processed_info}")
 
+        if package_type not in (1, 2):
+            logger.warning(f"Unbekannter Pakettyp: {package_type}")
+            return
+
+        # Ohne belegtes Lagerfach wird auch der Bestand nicht reduziert
+        index = locations.pick(package_type)
+        if index is None:
+            logger.warning(f"Kein Lagerfach mit Paket Typ {package_type} belegt")
+            return
+        publish_occupancy(client, index, package_type)
+        removed_count[package_type] += 1
+
         if package_type == 1:
             storage_package_type_1 -= 1
             logger.info(f"Paket Typ 1 ausgelagert. Neuer Bestand: {storage_package_type_1}")
-        elif package_type == 2:
+        else:
             storage_package_type_2 -= 1
             logger.info(f"Paket Typ 2 ausgelagert. Neuer Bestand: {storage_package_type_2}")
-        else:
-            logger.warning(f"Unbekannter Pakettyp: {package_type}")
     except json.JSONDecodeError as e:
         logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
     except Exception as e:
         logger.error(f"Fehler beim Verarbeiten der Bestätigung: {e}")
 
 
+def publish_occupancy(client, index, package_type):
+    """
+    Veröffentlicht die geänderte Belegung eines einzelnen Lagerfachs.
+    """
+    data = locations.location(index)
+    data["package_type"] = package_type
+    client.publish(OCCUPANCY_TOPIC, json.dumps(data))
+
 
 def store_package(client, userdata, msg):
     """
@@ -84,20 +143,55 @@ def store_package(client, userdata, msg):
         package_type = processed_info.get("package_type", "unknown")
         logger.info(f"Bestätigung vom Roboter empfangen: {processed_info}")
 
+        if package_type not in (1, 2):
+            logger.warning(f"Unbekannter Pakettyp: {package_type}")
+            return
+
+        # Ein Paket ohne freies Lagerfach wird nicht in den Bestand übernommen
+        index = locations.put_away(package_type)
+        if index is None:
+            logger.warning(f"Kein freies Lagerfach für Paket Typ {package_type}")
+            return
+        publish_occupancy(client, index, package_type)
+        received_count[package_type] += 1
+
         if package_type == 1:
             storage_package_type_1 += 1
             logger.info(f"Paket Typ 1 eingelagert. Neuer Bestand: {storage_package_type_1}")
-        elif package_type == 2:
+        else:
             storage_package_type_2 += 1
             logger.info(f"Paket Typ 2 eingelagert. Neuer Bestand: {storage_package_type_2}")
-        else:
-            logger.warning(f"Unbekannter Pakettyp: {package_type}")
     except json.JSONDecodeError as e:
         logger.error(f"Fehler beim Dekodieren der Nachricht: {e}")
     except Exception as e:
         logger.error(f"Fehler beim Verarbeiten der Bestätigung: {e}")
 
 
+def snapshot_state():
+    """
+    Zustand des Lagers für einen Checkpoint.
+    """
+    return {
+        "stock": [storage_package_type_1, storage_package_type_2],
+        "received": [received_count[1], received_count[2]],
+        "removed": [removed_count[1], removed_count[2]],
+        "bins": locations.snapshot()
+    }
+
+
+def restore_state(state):
+    """
+    Stellt den Zustand des Lagers aus einem Checkpoint wieder her.
+    """
+    global storage_package_type_1, storage_package_type_2, last_tick_seq
+
+    storage_package_type_1, storage_package_type_2 = state["stock"]
+    received_count[1], received_count[2] = state["received"]
+    removed_count[1], removed_count[2] = state["removed"]
+    locations.restore(state["bins"])
+    last_tick_seq = state["tick"]
+
+
 def main():
     """
     Main function to initialize the MQTT client and start the event loop.
@@ -110,7 +204,7 @@ def main():
     # Abonniere nur die Verarbeitungsbestätigungen der Roboter
 
     mqtt.subscribe(TICK_TOPIC)
-    mqtt.subscribe_with_callback(TICK_TOPIC, on_message_tick)
+    mqtt.subscribe_latest_with_callback(TICK_TOPIC, on_message_tick)
 
     mqtt.subscribe(ROBOTER_1_PROCESS_TOPIC)
     logger.info(f"Subscribing to processed topic: {ROBOTER_1_PROCESS_TOPIC}")
@@ -124,6 +218,8 @@ def main():
     logger.info(f"Subscribing to processed topic: {ROBOTER_3_PROCESS_TOPIC}")
     mqtt.subscribe_with_callback(ROBOTER_3_PROCESS_TOPIC, remove_package_from_storage)
 
+    enable_checkpoints(mqtt, snapshot_state, restore_state)
+
     try:
         logger.info("Starting MQTT loop...")
         mqtt.loop_forever()
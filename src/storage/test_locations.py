@@ -0,0 +1,57 @@
+from locations import StorageLocations, FIFO, LIFO
+
+
+def test_put_away_fills_front_bins_first():
+    locations = StorageLocations(1, 3, 2)
+    assert [locations.put_away(1) for _ in range(5)] == [0, 0, 1, 1, 2]
+    assert locations.occupied == [2, 2, 1]
+
+
+def test_put_away_returns_none_when_full():
+    locations = StorageLocations(1, 2, 1)
+    locations.put_away(1)
+    locations.put_away(2)
+    assert locations.put_away(1) is None
+    assert locations.count(1) == 1
+
+
+def test_fifo_picks_oldest_package():
+    locations = StorageLocations(1, 3, 1, FIFO)
+    first, second = locations.put_away(1), locations.put_away(1)
+    assert locations.pick(1) == first
+    assert locations.pick(1) == second
+
+
+def test_lifo_picks_newest_package():
+    locations = StorageLocations(1, 3, 1, LIFO)
+    first, second = locations.put_away(1), locations.put_away(1)
+    assert locations.pick(1) == second
+    assert locations.pick(1) == first
+
+
+def test_pick_of_missing_type_returns_none():
+    locations = StorageLocations(1, 2, 1)
+    locations.put_away(1)
+    assert locations.pick(2) is None
+
+
+def test_pick_from_full_bin_frees_it():
+    locations = StorageLocations(1, 2, 2)
+    for _ in range(4):
+        locations.put_away(1)
+    assert locations.put_away(1) is None
+    index = locations.pick(1)
+    assert locations.put_away(2) == index
+    assert locations.occupied == [2, 2]
+
+
+
+def test_snapshot_restore_round_trip():
+    locations = StorageLocations(1, 3, 2)
+    for package_type in (1, 2, 1, 2, 1):
+        locations.put_away(package_type)
+    restored = StorageLocations(1, 3, 2)
+    restored.restore(locations.snapshot())
+    assert restored.occupied == locations.occupied
+    assert restored.pick(1) == locations.pick(1)
+    assert restored.put_away(2) == locations.put_away(2)
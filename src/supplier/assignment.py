@@ -0,0 +1,119 @@
+import numpy as np
+
+# Kosten für unzulässige Paarungen (Roboter kann den Pakettyp nicht verarbeiten)
+INFEASIBLE = 1e9
+
+
+def min_cost_matching(cost):
+    """
+    Ungarische Methode (kürzeste augmentierende Pfade) auf einer Kostenmatrix.
+    Die Spaltenupdates sind mit NumPy vektorisiert, Laufzeit O(n^2 * m) im schlechtesten Fall.
+    Gibt zwei Arrays (Zeilen, Spalten) der zugeordneten Paare zurück.
+    """
+    cost = np.asarray(cost, dtype=float)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = min_cost_matching(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)      # p[j]: Zeile (1-basiert), die Spalte j belegt
+    way = np.zeros(m + 1, dtype=int)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free[1:] & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            candidates = np.where(free[1:], minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(p[1:])
+    return p[1:][cols] - 1, cols
+
+
+class AssignmentEngine:
+    """
+    Ordnet offene Aufträge (Pakettyp, Station) pro Tick den freien Robotern zu.
+    Die Fahrzeiten zwischen allen Stationen werden einmalig als Matrix berechnet.
+    """
+
+    def __init__(self, stations, capabilities, home, speed=1.0):
+        self.station_names = list(stations)
+        self.station_index = {name: i for i, name in enumerate(self.station_names)}
+        coords = np.array([stations[name] for name in self.station_names], dtype=float)
+        # Manhattan-Distanz zwischen allen Stationen geteilt durch Geschwindigkeit
+        self.travel = np.abs(coords[:, None, :] - coords[None, :, :]).sum(axis=2) / speed
+
+        self.robot_names = list(capabilities)
+        self.robot_index = {name: i for i, name in enumerate(self.robot_names)}
+        self.package_types = sorted({t for types in capabilities.values() for t in types})
+        self.type_index = {t: i for i, t in enumerate(self.package_types)}
+
+        self.capable = np.zeros((len(self.robot_names), len(self.package_types)), dtype=bool)
+        for name, types in capabilities.items():
+            for t in types:
+                self.capable[self.robot_index[name], self.type_index[t]] = True
+
+        self.robot_station = np.array([self.station_index[home[name]] for name in self.robot_names], dtype=int)
+        self.robot_ready = np.ones(len(self.robot_names), dtype=bool)
+
+    def set_ready(self, name, ready):
+        index = self.robot_index.get(name)
+        if index is not None:
+            self.robot_ready[index] = ready
+
+    def ready(self):
+        return {name: bool(self.robot_ready[i]) for i, name in enumerate(self.robot_names)}
+
+    def positions(self):
+        return {name: self.station_names[self.robot_station[i]] for i, name in enumerate(self.robot_names)}
+
+    def set_positions(self, positions):
+        for name, station in positions.items():
+            index = self.robot_index.get(name)
+            if index is not None:
+                self.robot_station[index] = self.station_index[station]
+
+    def assign(self, jobs):
+        """
+        jobs: Liste von (Pakettyp, Station). Gibt eine Liste von (Auftragsindex, Robotername) zurück.
+        Belegt sind nur Roboter, deren letzte Statusmeldung "running" war.
+        """
+        known = [i for i, (t, _) in enumerate(jobs) if t in self.type_index]
+        ready = np.flatnonzero(self.robot_ready)
+        if not known or ready.size == 0:
+            return []
+
+        job_types = np.array([self.type_index[jobs[i][0]] for i in known], dtype=int)
+        job_stations = np.array([self.station_index[jobs[i][1]] for i in known], dtype=int)
+
+        feasible = self.capable[ready][:, job_types].T
+        cost = np.where(feasible, self.travel[job_stations[:, None], self.robot_station[ready][None, :]], INFEASIBLE)
+        rows, cols = min_cost_matching(cost)
+        keep = feasible[rows, cols]
+        rows, robots = rows[keep], ready[cols[keep]]
+
+        self.robot_station[robots] = job_stations[rows]
+        return [(known[r], self.robot_names[b]) for r, b in zip(rows, robots)]
@@ -1,6 +1,7 @@
 import paho.mqtt.client as mqtt
 import logging
 import sys
+import threading
 
 
 class MQTTWrapper:
@@ -22,6 +23,9 @@ class MQTTWrapper:
         ch.setLevel(self.log_level)
         self.log.addHandler(ch)
 
+        # Serialises callbacks of the network loop and of the latest-only workers
+        self.callback_lock = threading.Lock()
+
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, self.name)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
@@ -43,7 +47,47 @@ class MQTTWrapper:
         self.client.subscribe(topic)
 
     def subscribe_with_callback(self, sub, callback):
-        self.client.message_callback_add(sub, callback)
+        self.client.message_callback_add(sub, self._locked(callback))
+
+    def subscribe_latest_with_callback(self, sub, callback):
+        # Latest-only delivery: messages that arrive while the callback is still
+        # busy are collapsed, the callback only sees the newest one.
+        cond = threading.Condition()
+        pending = {'userdata': None, 'msg': None, 'skipped': 0}
+
+        def enqueue(client, userdata, msg):
+            with cond:
+                if pending['msg'] is not None:
+                    pending['skipped'] += 1
+                pending['userdata'] = userdata
+                pending['msg'] = msg
+                cond.notify()
+
+        def worker():
+            while True:
+                with cond:
+                    while pending['msg'] is None:
+                        cond.wait()
+                    userdata, msg, skipped = pending['userdata'], pending['msg'], pending['skipped']
+                    pending['msg'] = None
+                    pending['skipped'] = 0
+                if skipped:
+                    self.log.debug('collapsed ' + str(skipped) + ' queued messages on ' + msg.topic)
+                with self.callback_lock:
+                    try:
+                        callback(self.client, userdata, msg)
+                    except Exception as e:
+                        # Keep the worker alive, otherwise no further message is delivered
+                        self.log.error('callback for ' + msg.topic + ' failed: ' + str(e))
+
+        threading.Thread(target=worker, name=self.name + '-' + sub, daemon=True).start()
+        self.client.message_callback_add(sub, enqueue)
+
+    def _locked(self, callback):
+        def wrapper(client, userdata, msg):
+            with self.callback_lock:
+                callback(client, userdata, msg)
+        return wrapper
 
     # The callback for when the client receives a CONNACK response from the server.
     def on_connect(self, client, userdata, flags, rc):
@@ -0,0 +1,16 @@
+from collections import namedtuple
+
+# Compact tick encoding: "<epoch>,<seq>" instead of an ISO-8601 timestamp.
+# epoch is the simulation time in seconds since 1970-01-01 UTC, seq counts
+# the ticks since the tick generator started.
+Tick = namedtuple('Tick', ['epoch', 'seq'])
+
+
+def encode_tick(epoch, seq):
+    return str(int(epoch)) + ',' + str(int(seq))
+
+
+def decode_tick(payload):
+    sep = b',' if isinstance(payload, (bytes, bytearray)) else ','
+    epoch, seq = payload.split(sep)
+    return Tick(int(epoch), int(seq))
@@ -4,6 +4,9 @@ import logging
 import os
 import time
 from mqtt.mqtt_wrapper import MQTTWrapper
+from mqtt.tick import decode_tick
+from mqtt.checkpoint import enable_checkpoints
+from assignment import AssignmentEngine
 
 # Logging-Konfiguration
 logging.basicConfig(
@@ -23,20 +26,46 @@ DATA_TOPIC = os.environ['EC_MQTT_TOPIC']
 
 # MQTT Subscribed TOPICS
 TICK_TOPIC = "tickgen/tick"
-ROBOTER_1_STATUS_TOPIC = 'roboter/1/status'
-ROBOTER_2_STATUS_TOPIC = 'roboter/2/status'
+ROBOTER_STATUS_TOPIC = 'roboter/+/status'
 
 ROBOTER_1_PROCESS_TOPIC = 'roboter/1/processed'
 ROBOTER_2_PROCESS_TOPIC = 'roboter/2/processed'
 
-ROBOTER_1_REQUEST_TOPIC = 'roboter/1/request'
-ROBOTER_2_REQUEST_TOPIC = 'roboter/2/request'
+ROBOTER_REQUEST_TOPIC = 'roboter/{}/request'
+
+# Stationen (x, y) und Abholstation je Pakettyp
+STATIONS = {"dock_1": (0, 0), "dock_2": (0, 20), "storage": (40, 10)}
+PICKUP_STATION = {1: "dock_1", 2: "dock_2"}
+
+# Flotte: "name:typ,typ:heimatstation;..."
+ROBOTER_FLEET = os.environ.get('ROBOTER_FLEET', 'roboter_1:1:dock_1;roboter_2:2:dock_2')
 
 
 # Variables
 supplier_package_type_1 = int(os.environ.get('PACKET_TYPE_1_UNIT', 100))
 supplier_package_type_2 = int(os.environ.get('PACKET_TYPE_2_UNIT', 100))
 
+# Angewendete Bestätigungen je Pakettyp, für den Bestandsabgleich
+shipped_count = {1: 0, 2: 0}
+
+# Sequenznummer des zuletzt verarbeiteten Ticks
+last_tick_seq = None
+
+
+def parse_fleet(fleet):
+    """
+    Liest die Flottenkonfiguration und gibt Fähigkeiten und Heimatstationen der Roboter zurück.
+    """
+    capabilities, home = {}, {}
+    for entry in fleet.split(';'):
+        name, types, station = entry.strip().split(':')
+        capabilities[name] = [int(t) for t in types.split(',')]
+        home[name] = station
+    return capabilities, home
+
+
+engine = AssignmentEngine(STATIONS, *parse_fleet(ROBOTER_FLEET))
+
 
 def request_package(client, robot_topic, package_type):
     """
@@ -51,35 +80,61 @@ def request_package(client, robot_topic, package_type):
 def on_message_tick(client, userdata, msg):
     """
     Callback für Tick-Nachrichten. Sendet Anfragen an Roboter, wenn Pakete verfügbar sind.
+    Bei Latest-only-Zustellung steht ein Tick für alle übersprungenen Ticks davor.
     """
-    global supplier_package_type_1, supplier_package_type_2
+    global supplier_package_type_1, supplier_package_type_2, last_tick_seq
 
-    ts_iso = msg.payload.decode("utf-8")
-    logger.info(f"Tick empfangen mit Timestamp: {ts_iso}")
+    tick = decode_tick(msg.payload)
+    skipped = tick.seq - last_tick_seq - 1 if last_tick_seq is not None else 0
+    last_tick_seq = tick.seq
+    if skipped > 0:
+        logger.info(f"Tick {tick.seq} empfangen, {skipped} Ticks übersprungen")
+    else:
+        logger.info(f"Tick {tick.seq} empfangen")
 
-    # Anfrage senden, Bestand wird NICHT reduziert
+    # Offene Aufträge sammeln, Bestand wird NICHT reduziert
+    jobs = []
     if supplier_package_type_1 > 0:
-        request_package(client, ROBOTER_1_REQUEST_TOPIC, 1)
+        jobs.append((1, PICKUP_STATION[1]))
     else:
         supplier_package_type_1 = 100
         logger.info(f"Supplier hat neue Pakete vom Typ 1 geliefert!")
     if supplier_package_type_2 > 0:
-        request_package(client, ROBOTER_2_REQUEST_TOPIC, 2)
+        jobs.append((2, PICKUP_STATION[2]))
     else:
         supplier_package_type_2 = 100
         logger.info(f"Supplier hat neue Pakete vom Typ 2 geliefert!")
+
+    # Aufträge den freien Robotern mit minimaler Fahrzeit zuordnen
+    for job, robot in engine.assign(jobs):
+        robot_topic = ROBOTER_REQUEST_TOPIC.format(robot.split('_')[-1])
+        request_package(client, robot_topic, jobs[job][0])
     
     # Nur aktuelle Bestände veröffentlichen, ohne sie zu ändern
     data = {
         "package_type_1": supplier_package_type_1,
         "package_type_2": supplier_package_type_2,
-        "timestamp": ts_iso
+        "shipped_1": shipped_count[1],
+        "shipped_2": shipped_count[2],
+        "timestamp": tick.epoch,
+        "tick": tick.seq
     }
     client.publish(DATA_TOPIC, json.dumps(data))
     logger.info(f"Bestand veröffentlicht (vor Verarbeitung): {data}")
 
 
 
+def on_roboter_status(client, userdata, msg):
+    """
+    Callback für Statusmeldungen der Roboter. Nur nicht laufende Roboter erhalten neue Aufträge.
+    """
+    try:
+        status_info = json.loads(msg.payload.decode("utf-8"))
+        engine.set_ready(status_info.get("name"), status_info.get("status") != "running")
+    except Exception as e:
+        logger.error(f"Fehler beim Verarbeiten des Roboterstatus: {e}")
+
+
 def on_package_processed(client, userdata, msg):
     """
     Callback für Verarbeitungsbestätigungen von Robotern. Reduziert den Paketbestand.
@@ -95,9 +150,11 @@ def on_package_processed(client, userdata, msg):
         # Bestand basierend auf Pakettyp reduzieren
         if package_type == 1 and supplier_package_type_1 > 0:
             supplier_package_type_1 -= 1
+            shipped_count[1] += 1
             logger.info(f"Bestand Typ 1 reduziert. Verbleibend: {supplier_package_type_1}")
         elif package_type == 2 and supplier_package_type_2 > 0:
             supplier_package_type_2 -= 1
+            shipped_count[2] += 1
             logger.info(f"Bestand Typ 2 reduziert. Verbleibend: {supplier_package_type_2}")
         else:
             logger.warning(f"Unbekannter oder inkonsistenter Pakettyp: {package_type}")
@@ -106,6 +163,32 @@ def on_package_processed(client, userdata, msg):
 
 
 
+def snapshot_state():
+    """
+    Zustand des Suppliers für einen Checkpoint.
+    """
+    return {
+        "stock": [supplier_package_type_1, supplier_package_type_2],
+        "shipped": [shipped_count[1], shipped_count[2]],
+        "robots": engine.positions(),
+        "ready": engine.ready()
+    }
+
+
+def restore_state(state):
+    """
+    Stellt den Zustand des Suppliers aus einem Checkpoint wieder her.
+    """
+    global supplier_package_type_1, supplier_package_type_2, last_tick_seq
+
+    supplier_package_type_1, supplier_package_type_2 = state["stock"]
+    shipped_count[1], shipped_count[2] = state["shipped"]
+    engine.set_positions(state["robots"])
+    for name, ready in state["ready"].items():
+        engine.set_ready(name, ready)
+    last_tick_seq = state["tick"]
+
+
 def main():
     """
     Main function to initialize the MQTT client and start the event loop.
@@ -121,16 +204,23 @@ def main():
     mqtt.subscribe(ROBOTER_2_PROCESS_TOPIC)
     logger.info(f"Subscribing to tick topic: {ROBOTER_2_PROCESS_TOPIC}")
 
+    mqtt.subscribe(ROBOTER_STATUS_TOPIC)
+    logger.info(f"Subscribing to status topic: {ROBOTER_STATUS_TOPIC}")
+
     mqtt.subscribe(TICK_TOPIC)
     logger.info(f"Subscribing to tick topic: {TICK_TOPIC}")
 
-    mqtt.subscribe_with_callback(TICK_TOPIC, on_message_tick)
+    mqtt.subscribe_latest_with_callback(TICK_TOPIC, on_message_tick)
 
 
     mqtt.subscribe_with_callback(ROBOTER_1_PROCESS_TOPIC, on_package_processed)
 
     mqtt.subscribe_with_callback(ROBOTER_2_PROCESS_TOPIC, on_package_processed)
 
+    mqtt.subscribe_with_callback(ROBOTER_STATUS_TOPIC, on_roboter_status)
+
+    enable_checkpoints(mqtt, snapshot_state, restore_state)
+
 
     try:
         logger.info("Starting MQTT loop...")
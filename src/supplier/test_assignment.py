@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+
+from assignment import AssignmentEngine, min_cost_matching
+
+STATIONS = {"dock_1": (0, 0), "dock_2": (0, 20), "storage": (40, 10)}
+
+
+def brute_force(cost):
+    n, m = cost.shape
+    if n <= m:
+        return min(cost[range(n), list(p)].sum() for p in itertools.permutations(range(m), n))
+    return min(cost[list(p), range(m)].sum() for p in itertools.permutations(range(n), m))
+
+
+def test_matching_is_optimal_on_random_matrices():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        n, m = rng.integers(1, 6, 2)
+        cost = rng.integers(0, 50, (n, m)).astype(float)
+        rows, cols = min_cost_matching(cost)
+        assert len(rows) == min(n, m)
+        assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+        assert cost[rows, cols].sum() == brute_force(cost)
+
+
+def test_matching_of_tall_matrix_returns_rows_in_order():
+    cost = np.array([[5.0], [1.0], [3.0]])
+    rows, cols = min_cost_matching(cost)
+    assert list(rows) == [1] and list(cols) == [0]
+
+    cost = np.array([[4.0, 1.0], [2.0, 8.0], [1.0, 9.0]])
+    rows, cols = min_cost_matching(cost)
+    assert list(rows) == sorted(rows)
+    assert cost[rows, cols].sum() == 2.0
+
+
+def make_engine():
+    capabilities = {"roboter_1": [1], "roboter_2": [2], "roboter_3": [1, 2]}
+    home = {"roboter_1": "dock_1", "roboter_2": "dock_2", "roboter_3": "storage"}
+    return AssignmentEngine(STATIONS, capabilities, home)
+
+
+def test_travel_matrix_is_manhattan_distance():
+    engine = make_engine()
+    assert engine.travel[0, 1] == 20
+    assert engine.travel[0, 2] == 50
+
+
+def test_assign_respects_capabilities():
+    engine = make_engine()
+    engine.set_ready("roboter_3", False)
+    assignments = dict(engine.assign([(2, "dock_1"), (1, "dock_2")]))
+    assert assignments == {0: "roboter_2", 1: "roboter_1"}
+
+
+def test_assign_prefers_nearest_capable_robot():
+    engine = make_engine()
+    assert engine.assign([(1, "storage")]) == [(0, "roboter_3")]
+
+
+def test_assign_skips_busy_robots_and_unknown_types():
+    engine = make_engine()
+    engine.set_ready("roboter_1", False)
+    engine.set_ready("roboter_3", False)
+    assert engine.assign([(3, "dock_1"), (1, "dock_1"), (2, "dock_2")]) == [(2, "roboter_2")]
+
+
+def test_assign_moves_robot_to_job_station():
+    engine = make_engine()
+    assert engine.assign([(1, "dock_2")]) == [(0, "roboter_1")]
+    assert engine.robot_station[engine.robot_index["roboter_1"]] == engine.station_index["dock_2"]
+
+
+def test_ready_flags_round_trip():
+    engine = make_engine()
+    engine.set_ready("roboter_2", False)
+    restored = make_engine()
+    for name, ready in engine.ready().items():
+        restored.set_ready(name, ready)
+    assert restored.ready() == {"roboter_1": True, "roboter_2": False, "roboter_3": True}
+    assert restored.assign([(2, "dock_2")]) == [(0, "roboter_3")]
+
+
+def test_positions_round_trip():
+    engine = make_engine()
+    engine.assign([(1, "dock_2")])
+    assert engine.positions() == {"roboter_1": "dock_2", "roboter_2": "dock_2", "roboter_3": "storage"}
+    restored = make_engine()
+    restored.set_positions(engine.positions())
+    assert restored.positions() == engine.positions()
@@ -1,37 +1,166 @@
+import os
 import sys
 import json
 import time
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timezone
 from mqtt.mqtt_wrapper import MQTTWrapper
+from mqtt.tick import encode_tick
+from mqtt.checkpoint import (CHECKPOINT_COMMAND_TOPIC, RESTORE_COMMAND_TOPIC, CHECKPOINT_REQUEST_TOPIC,
+                             SNAPSHOT_TOPIC, RESTORE_TOPIC, encode_snapshot, decode_snapshot)
 
 TICK_TOPIC = "tickgen/tick"
 SPEEDFACTOR_TOPIC = "tickgen/speed_factor"
 interval_sec = 30
 speed_factor = 10
 
+# Nodes that take part in checkpoints and how long to wait for their snapshots. Robots
+# answer only between two packages, so the timeout must exceed the longest processing time (5 s)
+CHECKPOINT_NODES = set(os.environ.get('CHECKPOINT_NODES', 'storage_1,supplier_1,roboter_1,roboter_2,roboter_3').split(','))
+CHECKPOINT_TIMEOUT = float(os.environ.get('CHECKPOINT_TIMEOUT', 15))
+# Directory the complete checkpoints are written to, survives a restart of the broker
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', '/checkpoints')
+# Checkpoint id to fork from on startup
+RESTORE_CHECKPOINT = os.environ.get('RESTORE_CHECKPOINT')
+
+# Pending checkpoint command, handled at the next tick boundary
+checkpoint_command = ('restore', RESTORE_CHECKPOINT) if RESTORE_CHECKPOINT else None
+
 def on_message_speedfactor(client, userdata, msg):
     global speed_factor
     new_speed_factor = float(msg.payload.decode("utf-8"))
     if speed_factor >= 0.1:
         speed_factor = new_speed_factor
 
+def on_message_checkpoint(client, userdata, msg):
+    global checkpoint_command
+    checkpoint_command = ('checkpoint', msg.payload.decode("utf-8"))
+
+def on_message_restore(client, userdata, msg):
+    global checkpoint_command
+    checkpoint_command = ('restore', msg.payload.decode("utf-8"))
+
+def collect_snapshots(mqtt, checkpoint_id, tick=None, trigger=None):
+    # Waits until every node of CHECKPOINT_NODES published its snapshot (of the
+    # given tick, older retained ones are ignored) or the timeout expires
+    topic = SNAPSHOT_TOPIC.format(checkpoint_id, '+')
+    expected = CHECKPOINT_NODES | {mqtt.name}
+    snapshots = {}
+    done = threading.Event()
+
+    def on_snapshot(client, userdata, msg):
+        if not msg.payload or (tick is not None and decode_snapshot(msg.payload)['tick'] != tick):
+            return
+        snapshots[msg.topic.rsplit('/', 1)[1]] = msg.payload
+        if expected <= snapshots.keys():
+            done.set()
+
+    mqtt.subscribe_with_callback(topic, on_snapshot)
+    mqtt.subscribe(topic)
+    if trigger is not None:
+        trigger()
+    done.wait(CHECKPOINT_TIMEOUT)
+    mqtt.client.unsubscribe(topic)
+    mqtt.client.message_callback_remove(topic)
+
+    missing = expected - snapshots.keys()
+    if missing:
+        mqtt.log.warning('checkpoint ' + checkpoint_id + ' without snapshots of ' + ', '.join(sorted(missing)))
+    return snapshots
+
+def checkpoint_path(checkpoint_id):
+    return os.path.join(CHECKPOINT_DIR, os.path.basename(checkpoint_id) + '.ckpt')
+
+def save_checkpoint(checkpoint_id, snapshots):
+    # One file per checkpoint with the state of every node, written atomically
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = checkpoint_path(checkpoint_id)
+    states = {name: decode_snapshot(payload) for name, payload in snapshots.items()}
+    with open(path + '.tmp', 'wb') as f:
+        f.write(encode_snapshot(states))
+    os.replace(path + '.tmp', path)
+
+def load_checkpoint(checkpoint_id):
+    path = checkpoint_path(checkpoint_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        states = decode_snapshot(f.read())
+    return {name: encode_snapshot(state) for name, state in states.items()}
+
+def take_checkpoint(mqtt, checkpoint_id, state):
+    # Returns False if a node did not answer in time, the partial checkpoint is discarded
+    tick = state['tick_seq'] - 1
+    state['tick'] = tick
+    mqtt.client.publish(SNAPSHOT_TOPIC.format(checkpoint_id, mqtt.name), encode_snapshot(state), qos=1, retain=True)
+    snapshots = collect_snapshots(mqtt, checkpoint_id, tick, lambda: mqtt.publish(
+        CHECKPOINT_REQUEST_TOPIC, json.dumps({"id": checkpoint_id, "tick": tick})))
+    if not CHECKPOINT_NODES | {mqtt.name} <= snapshots.keys():
+        for name in snapshots:
+            mqtt.client.publish(SNAPSHOT_TOPIC.format(checkpoint_id, name), b'', qos=1, retain=True)
+        mqtt.log.error('checkpoint ' + checkpoint_id + ' failed at tick ' + str(tick))
+        return False
+    save_checkpoint(checkpoint_id, snapshots)
+    mqtt.log.info('checkpoint ' + checkpoint_id + ' taken at tick ' + str(tick))
+    return True
+
+def restore_checkpoint(mqtt, checkpoint_id):
+    # Checkpoints on disk take precedence, retained snapshots are lost with the broker
+    snapshots = load_checkpoint(checkpoint_id)
+    if snapshots is None:
+        snapshots = collect_snapshots(mqtt, checkpoint_id)
+    own = snapshots.pop(mqtt.name, None)
+    if own is None:
+        mqtt.log.warning('no checkpoint ' + checkpoint_id + ' found')
+        return None
+    for name, payload in snapshots.items():
+        mqtt.client.publish(RESTORE_TOPIC.format(name), payload, qos=1)
+    state = decode_snapshot(own)
+    mqtt.log.info('restored checkpoint ' + checkpoint_id + ' at tick ' + str(state['tick']))
+    return state
+
 def main():
+    global checkpoint_command, speed_factor
+
     START_DATE = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start_epoch = int(START_DATE.replace(tzinfo=timezone.utc).timestamp())
     tick_sec = 0
+    tick_seq = 0
     
     mqtt = MQTTWrapper('mqttbroker', 1883, name='tick_generator')
     mqtt.publish(SPEEDFACTOR_TOPIC, speed_factor)
     mqtt.subscribe(SPEEDFACTOR_TOPIC)
     mqtt.subscribe_with_callback(SPEEDFACTOR_TOPIC, on_message_speedfactor)
+    mqtt.subscribe(CHECKPOINT_COMMAND_TOPIC)
+    mqtt.subscribe_with_callback(CHECKPOINT_COMMAND_TOPIC, on_message_checkpoint)
+    mqtt.subscribe(RESTORE_COMMAND_TOPIC)
+    mqtt.subscribe_with_callback(RESTORE_COMMAND_TOPIC, on_message_restore)
+
+    if RESTORE_CHECKPOINT:
+        # Give the other nodes time to connect before forking from the checkpoint
+        time.sleep(CHECKPOINT_TIMEOUT)
 
     try:
         while True:
-            ts = START_DATE + timedelta(seconds=tick_sec)
-            ts_iso = ts.isoformat()
+            if checkpoint_command is not None:
+                command, checkpoint_id = checkpoint_command
+                checkpoint_command = None
+                if command == 'checkpoint':
+                    take_checkpoint(mqtt, checkpoint_id, {"start_epoch": start_epoch, "tick_sec": tick_sec,
+                                                          "tick_seq": tick_seq, "speed_factor": speed_factor})
+                else:
+                    state = restore_checkpoint(mqtt, checkpoint_id)
+                    if state is not None:
+                        start_epoch = state['start_epoch']
+                        tick_sec = state['tick_sec']
+                        tick_seq = state['tick_seq']
+                        speed_factor = state['speed_factor']
+                        mqtt.publish(SPEEDFACTOR_TOPIC, speed_factor)
 
-            mqtt.publish(TICK_TOPIC, ts_iso)
+            mqtt.publish(TICK_TOPIC, encode_tick(start_epoch + tick_sec, tick_seq))
             tick_sec = tick_sec + 30
+            tick_seq = tick_seq + 1
             time.sleep(interval_sec * (1.0 / speed_factor))
     except(KeyboardInterrupt, SystemExit):
         mqtt.stop()